@@ -0,0 +1,224 @@
+"""
+Whole-area demand / competition surfaces for GET /heatmap.
+
+Instead of probing /analyze point by point, the population raster for a bbox is
+convolved once with the catchment disc (FFT), giving the catchment mean at every
+pixel. POIs are binned onto the same pixel grid and convolved with a disc of the
+true ground radius (like Overpass `around:` in /analyze), giving the competitor
+count within the radius of every pixel.
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+RASTER_OK = True
+try:
+    import rasterio
+    from rasterio.enums import Resampling
+    from rasterio.warp import transform_bounds
+    from rasterio.windows import from_bounds, Window
+    from pyproj import Transformer
+except Exception:
+    RASTER_OK = False
+
+HEATMAP_MAX_SIDE = 1024      # output grids are decimated above this many pixels per side
+FALLBACK_CELL_M = 100        # grid spacing when no raster is available
+
+@dataclass
+class Grid:
+    values: Optional[np.ndarray]   # population per pixel (NaN = nodata); None without raster
+    lon_edges: Tuple[float, float] # west, east  (EPSG:4326)
+    lat_edges: Tuple[float, float] # south, north (EPSG:4326)
+    shape: Tuple[int, int]
+    ax_px: float                   # demand kernel semi-axes in pixels (Web Mercator circle)
+    ay_px: float
+    gx_px: float                   # competitor kernel semi-axes in pixels (ground radius)
+    gy_px: float
+    pad: Tuple[int, int]           # (rows, cols) of halo around the requested bbox
+    to_pixel: Callable             # (lon[], lat[]) -> (row[], col[]) in the padded grid
+
+# ---- Kernel & convolution ----------------------------------------------------
+
+def disc_kernel(ax_px: float, ay_px: float) -> np.ndarray:
+    """Elliptical 0/1 kernel; pixel centres inside the catchment are 1."""
+    rx, ry = max(1, int(math.ceil(ax_px))), max(1, int(math.ceil(ay_px)))
+    yy, xx = np.ogrid[-ry:ry + 1, -rx:rx + 1]
+    return ((xx / max(ax_px, 1e-6)) ** 2 + (yy / max(ay_px, 1e-6)) ** 2 <= 1.0).astype(np.float64)
+
+def fft_convolve(a: np.ndarray, k: np.ndarray) -> np.ndarray:
+    """'same'-size linear convolution via real FFT (zero padding, no wrap-around)."""
+    sh = (a.shape[0] + k.shape[0] - 1, a.shape[1] + k.shape[1] - 1)
+    full = np.fft.irfft2(np.fft.rfft2(a, sh) * np.fft.rfft2(k, sh), sh)
+    r0, c0 = k.shape[0] // 2, k.shape[1] // 2
+    return full[r0:r0 + a.shape[0], c0:c0 + a.shape[1]]
+
+def catchment_mean(values: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    """Mean of valid pixels within the kernel around every pixel (NaN where none)."""
+    valid = np.isfinite(values)
+    sums = fft_convolve(np.where(valid, values, 0.0), kernel)
+    counts = np.rint(fft_convolve(valid.astype(np.float64), kernel))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+def catchment_count(rows: np.ndarray, cols: np.ndarray, shape: Tuple[int, int], kernel: np.ndarray) -> np.ndarray:
+    """Number of points within the kernel around every pixel."""
+    hist = np.zeros(shape, dtype=np.float64)
+    ok = (rows >= 0) & (rows < shape[0]) & (cols >= 0) & (cols < shape[1])
+    np.add.at(hist, (rows[ok], cols[ok]), 1.0)
+    return np.rint(fft_convolve(hist, kernel))
+
+# ---- Grid construction -------------------------------------------------------
+
+def _semi_axes_px(lat: float, radius_m: int, px_w_m: float, px_h_m: float) -> Tuple[float, float]:
+    # Same catchment as /analyze: a radius_m circle in Web Mercator metres
+    r_ground = radius_m * math.cos(math.radians(lat))
+    return r_ground / px_w_m, r_ground / px_h_m
+
+def _ground_axes_px(radius_m: int, px_w_m: float, px_h_m: float) -> Tuple[float, float]:
+    # Same catchment as Overpass around:radius_m, in true metres
+    return radius_m / px_w_m, radius_m / px_h_m
+
+def grid_from_raster(tif_path: str, bbox: Tuple[float, float, float, float], radius_m: int) -> Optional[Grid]:
+    """Read the raster window covering bbox plus a one-radius halo (decimated if large)."""
+    if not RASTER_OK:
+        return None
+    west, south, east, north = bbox
+    lat_c = (south + north) / 2.0
+    with rasterio.open(tif_path) as ds:
+        if ds.crs is None:
+            return None
+        to_ds = Transformer.from_crs("EPSG:4326", ds.crs, always_xy=True)
+        to_m = Transformer.from_crs("EPSG:4326", "EPSG:3857", always_xy=True)
+        from_m = Transformer.from_crs("EPSG:3857", ds.crs, always_xy=True)
+
+        # catchment extent in dataset units, measured through Web Mercator like /analyze
+        cx, cy = to_m.transform((west + east) / 2.0, lat_c)
+        x0, y0 = from_m.transform(cx, cy)
+        x1, _ = from_m.transform(cx + radius_m, cy)
+        _, y1 = from_m.transform(cx, cy + radius_m)
+        rx_ds, ry_ds = abs(x1 - x0), abs(y1 - y0)
+        # a true-metres radius spans 1/cos(lat) Mercator metres (competitor disc, halo)
+        r_merc = radius_m / math.cos(math.radians(lat_c))
+        x2, _ = from_m.transform(cx + r_merc, cy)
+        _, y2 = from_m.transform(cx, cy + r_merc)
+        gx_ds, gy_ds = abs(x2 - x0), abs(y2 - y0)
+
+        l, b, r, t = transform_bounds("EPSG:4326", ds.crs, west, south, east, north)
+        inner = from_bounds(l, b, r, t, ds.transform).round_offsets().round_lengths()
+        px_w, px_h = abs(ds.transform.a), abs(ds.transform.e)
+        pad_c, pad_r = int(math.ceil(max(rx_ds, gx_ds) / px_w)), int(math.ceil(max(ry_ds, gy_ds) / px_h))
+        win = Window(inner.col_off - pad_c, inner.row_off - pad_r,
+                     inner.width + 2 * pad_c, inner.height + 2 * pad_r)
+        if win.width <= 0 or win.height <= 0:
+            return None
+
+        f = max(1, int(math.ceil(max(inner.width, inner.height) / HEATMAP_MAX_SIDE)))
+        out_shape = (max(1, int(math.ceil(win.height / f))), max(1, int(math.ceil(win.width / f))))
+        arr = ds.read(1, window=win, out_shape=out_shape, boundless=True, masked=True,
+                      resampling=Resampling.average).astype("float64")
+        values = arr.filled(np.nan)
+
+        win_tf = ds.window_transform(win)
+        sx, sy = win.width / out_shape[1], win.height / out_shape[0]
+
+        def to_pixel(lon: np.ndarray, lat: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+            xs, ys = to_ds.transform(np.asarray(lon), np.asarray(lat))
+            c, r_ = ~win_tf * (np.asarray(xs), np.asarray(ys))
+            return (np.floor(np.asarray(r_) / sy).astype(np.int64), np.floor(np.asarray(c) / sx).astype(np.int64))
+
+    return Grid(
+        values=values,
+        lon_edges=(west, east), lat_edges=(south, north),
+        shape=out_shape,
+        ax_px=rx_ds / (px_w * sx), ay_px=ry_ds / (px_h * sy),
+        gx_px=gx_ds / (px_w * sx), gy_px=gy_ds / (px_h * sy),
+        pad=(int(round(pad_r / sy)), int(round(pad_c / sx))),
+        to_pixel=to_pixel,
+    )
+
+def grid_without_raster(bbox: Tuple[float, float, float, float], radius_m: int) -> Grid:
+    """Plain lon/lat grid at ~FALLBACK_CELL_M spacing, used for competition only."""
+    west, south, east, north = bbox
+    lat_c = (south + north) / 2.0
+    m_x = 111_320 * math.cos(math.radians(lat_c))
+    m_y = 110_540
+    cell = max(FALLBACK_CELL_M, max((east - west) * m_x, (north - south) * m_y) / HEATMAP_MAX_SIDE)
+    dlon, dlat = cell / m_x, cell / m_y
+    ax, ay = _semi_axes_px(lat_c, radius_m, cell, cell)
+    gx, gy = _ground_axes_px(radius_m, cell, cell)
+    pad_c, pad_r = int(math.ceil(max(ax, gx))), int(math.ceil(max(ay, gy)))
+    inner_w = max(1, int(math.ceil((east - west) / dlon)))
+    inner_h = max(1, int(math.ceil((north - south) / dlat)))
+    lon0, lat0 = west - pad_c * dlon, north + pad_r * dlat
+
+    def to_pixel(lon: np.ndarray, lat: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return (np.floor((lat0 - np.asarray(lat)) / dlat).astype(np.int64),
+                np.floor((np.asarray(lon) - lon0) / dlon).astype(np.int64))
+
+    return Grid(
+        values=None,
+        lon_edges=(west, east), lat_edges=(south, north),
+        shape=(inner_h + 2 * pad_r, inner_w + 2 * pad_c),
+        ax_px=ax, ay_px=ay, gx_px=gx, gy_px=gy, pad=(pad_r, pad_c),
+        to_pixel=to_pixel,
+    )
+
+# ---- Surfaces ----------------------------------------------------------------
+
+def compute_surfaces(grid: Grid, pois: List[Dict]) -> Tuple[Optional[np.ndarray], np.ndarray]:
+    """(catchment-mean density, competitor count) cropped to the requested bbox."""
+    pr, pc = grid.pad
+    crop = (slice(pr, grid.shape[0] - pr), slice(pc, grid.shape[1] - pc))
+
+    mean = None
+    if grid.values is not None:
+        mean = catchment_mean(grid.values, disc_kernel(grid.ax_px, grid.ay_px))[crop]
+
+    lon = np.fromiter((p["lon"] for p in pois), dtype=np.float64, count=len(pois))
+    lat = np.fromiter((p["lat"] for p in pois), dtype=np.float64, count=len(pois))
+    rows, cols = grid.to_pixel(lon, lat) if len(pois) else (np.empty(0, np.int64), np.empty(0, np.int64))
+    counts = catchment_count(rows, cols, grid.shape, disc_kernel(grid.gx_px, grid.gy_px))[crop]
+    return mean, counts
+
+def density_scores(mean: Optional[np.ndarray], shape: Tuple[int, int], max_val: float) -> np.ndarray:
+    """Vector form of main.density_to_score (60 where there is no data)."""
+    if mean is None:
+        return np.full(shape, 60, dtype=np.uint8)
+    s = np.clip(np.round(100.0 * (mean / max_val)), 0, 100)
+    return np.where(np.isfinite(s), s, 60).astype(np.uint8)
+
+def competition_scores(counts: np.ndarray, radius_m: int) -> np.ndarray:
+    """Vector form of main.competition_score_from_pois."""
+    area_km2 = math.pi * (radius_m / 1000.0) ** 2
+    dens = counts / area_km2 if area_km2 > 0 else np.zeros_like(counts)
+    return np.clip(np.round(dens * 15), 0, 100).astype(np.uint8)
+
+# ---- Encoding ----------------------------------------------------------------
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    """Minimal RGBA8 PNG writer (no imaging dependency)."""
+    h, w, _ = rgba.shape
+    raw = b"".join(b"\x00" + rgba[i].tobytes() for i in range(h))
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 6, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 6))
+            + chunk(b"IEND", b""))
+
+def scores_to_png(demand: np.ndarray, competition: np.ndarray, valid: np.ndarray) -> bytes:
+    """R = demand score, G = competition score (0..100 scaled to 0..255), A = data present."""
+    rgba = np.zeros(demand.shape + (4,), dtype=np.uint8)
+    rgba[..., 0] = (demand.astype(np.uint16) * 255 // 100).astype(np.uint8)
+    rgba[..., 1] = (competition.astype(np.uint16) * 255 // 100).astype(np.uint8)
+    rgba[..., 3] = np.where(valid, 200, 0).astype(np.uint8)
+    return encode_png(rgba)
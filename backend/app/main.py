@@ -2,6 +2,9 @@
 FastAPI app for GeoAI / Sythesys
 - POST /analyze : computes demand, risk, competition from inputs; returns summary + pros/cons + scores
 - POST /predict : uses trained scikit-learn model (joblib) to return label + confidence
+- GET  /heatmap : demand & competition surfaces for a whole bbox (JSON, PNG or float32 grid)
+- POST /what-if : risk surface over budget × seating × hours for one site
+- GET  /tiles/{z}/{x}/{y}.mvt : vector tiles over the precomputed opportunity hexes
 
 Run:
   conda activate geoai-backend
@@ -11,6 +14,7 @@ Run:
 from __future__ import annotations
 
 import os
+import sys
 import json
 import math
 import time
@@ -18,7 +22,7 @@ import hashlib
 from typing import List, Dict, Optional, Tuple
 
 import numpy as np
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
@@ -69,9 +73,26 @@ except Exception:
 # Overpass for POIs (competition)
 import requests
 
+from . import heatmap as heatmap_mod
+from . import rules
+from . import tiles
+from .responses import CompressionMiddleware, FastJSONResponse, columnar_response
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# Offline gazetteer (src/utils/gazetteer.py) to resolve address/city without network
+try:
+    if _ROOT not in sys.path:
+        sys.path.append(_ROOT)
+    from src.utils.gazetteer import load_gazetteer
+    GAZETTEER_PATH = os.getenv("GAZETTEER_DIR", os.path.join(_ROOT, "data", "gazetteer"))
+except Exception:
+    load_gazetteer = None
+
 # -----------------------------------------------------------------------------
 
-app = FastAPI(title="Sythesys API", version="1.0")
+# orjson-backed JSON by default (same payloads, faster encoding)
+app = FastAPI(title="Sythesys API", version="1.0", default_response_class=FastJSONResponse)
 
 # CORS for local dev (you can tighten or remove when using Next.js proxy)
 app.add_middleware(
@@ -85,6 +106,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip (or brotli when installed) for responses above COMPRESS_MIN_BYTES, per Accept-Encoding
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("COMPRESS_MIN_BYTES", "1024")))
+
 # ---- Business profiles & helpers --------------------------------------------
 
 BUSINESS_PROFILES: Dict[str, Dict] = {
@@ -114,11 +138,10 @@ BUSINESS_PROFILES: Dict[str, Dict] = {
     },
 }
 
-def _norm_project_key(name: str) -> str:
-    return (name or "").strip().lower().replace(" ", "_")
+PROFILE_TABLE = rules.compile_profiles(BUSINESS_PROFILES)
 
 def tags_for_project_type(project_type: str) -> Dict[str, str]:
-    pk = _norm_project_key(project_type)
+    pk = rules.norm_project_key(project_type)
     return BUSINESS_PROFILES.get(pk, BUSINESS_PROFILES["cafe"])["poi_tags"]
 
 def clamp(x: float, lo: int = 0, hi: int = 100) -> int:
@@ -161,6 +184,50 @@ def mean_density_from_raster(lat: float, lon: float, radius_m: int) -> Optional[
     except Exception:
         return None
 
+def mean_density_multi(lat: float, lon: float, radii: List[int]) -> Dict[int, Optional[float]]:
+    """
+    Mean raster value within each radius, from a single read at the largest one.
+    Pixels (by centre) are binned by Web Mercator distance, the same circle /analyze masks with.
+    """
+    out: Dict[int, Optional[float]] = {r: None for r in radii}
+    if not GEO_OK:
+        return out
+
+    tif_path = os.getenv("POP_TIF_PATH", "")
+    if not tif_path or not os.path.exists(tif_path):
+        return out
+
+    try:
+        with rasterio.open(tif_path) as ds:
+            wgs84 = CRS.from_epsg(4326)
+            webm = CRS.from_epsg(3857)
+            to_m = Transformer.from_crs(wgs84, webm, always_xy=True).transform
+            to_ds = Transformer.from_crs(webm, ds.crs, always_xy=True).transform
+            ds_to_m = Transformer.from_crs(ds.crs, webm, always_xy=True).transform
+
+            x_m, y_m = to_m(lon, lat)
+            circle_m = Point(x_m, y_m).buffer(max(radii), resolution=64)
+            circle_ds = shapely_transform(to_ds, circle_m)
+
+            out_img, out_tf = mask(ds, [mapping(circle_ds)], crop=True, filled=False)
+            arr = out_img[0]
+            valid = ~np.ma.getmaskarray(arr)
+            rows, cols = np.nonzero(valid)
+            vals = np.asarray(arr[rows, cols], dtype="float64")
+            px, py = out_tf * (cols + 0.5, rows + 0.5)
+            pxm, pym = ds_to_m(np.asarray(px), np.asarray(py))
+            dist = np.hypot(np.asarray(pxm) - x_m, np.asarray(pym) - y_m)
+
+            keep = np.isfinite(vals)
+            order = np.argsort(dist[keep])
+            dist, csum = dist[keep][order], np.cumsum(vals[keep][order])
+            for r in radii:
+                n = int(np.searchsorted(dist, r, side="right"))
+                out[r] = float(csum[n - 1] / n) if n > 0 else None
+    except Exception:
+        pass
+    return out
+
 def density_to_score(mean_density: Optional[float], max_val: Optional[float] = None) -> int:
     """
     Map raw raster mean to 0..100. Tune 'max_val' by dataset:
@@ -181,6 +248,9 @@ def density_to_score(mean_density: Optional[float], max_val: Optional[float] = N
 # ---- Competition from OSM Overpass ------------------------------------------
 
 OVERPASS_URL = "https://overpass-api.de/api/interpreter"
+OVERPASS_TIMEOUT_S = 25         # [timeout:] for radius queries (/analyze)
+OVERPASS_BBOX_TIMEOUT_S = 60    # [timeout:] for bbox queries (/heatmap)
+OVERPASS_CLIENT_GRACE_S = 5     # HTTP timeout = query timeout + grace
 POI_CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", "cache", "pois")
 os.makedirs(POI_CACHE_DIR, exist_ok=True)
 
@@ -202,7 +272,7 @@ def fetch_pois_overpass(lat: float, lon: float, radius_m: int, tags: Dict[str, s
 
     filters = "".join([f'["{k}"="{v}"]' for k, v in tags.items()])
     ql = f"""
-    [out:json][timeout:25];
+    [out:json][timeout:{OVERPASS_TIMEOUT_S}];
     (
       node{filters}(around:{radius_m},{lat},{lon});
       way{filters}(around:{radius_m},{lat},{lon});
@@ -210,11 +280,45 @@ def fetch_pois_overpass(lat: float, lon: float, radius_m: int, tags: Dict[str, s
     );
     out center;
     """
+    return _run_overpass(ql, cache_fp, OVERPASS_TIMEOUT_S)
+
+def fetch_pois_overpass_bbox(bbox: Tuple[float, float, float, float], tags: Dict[str, str],
+                             timeout_s: int = OVERPASS_BBOX_TIMEOUT_S) -> List[Dict]:
+    """
+    Same as fetch_pois_overpass, for a (west, south, east, north) box.
+    Raises on a failed query (large boxes can time out) so callers can tell it from "no POIs".
+    """
+    west, south, east, north = bbox
+    key = f"bbox_{west:.5f}_{south:.5f}_{east:.5f}_{north:.5f}_{json.dumps(tags, sort_keys=True)}"
+    cache_fp = os.path.join(POI_CACHE_DIR, f"{hashlib.md5(key.encode()).hexdigest()}.json")
+    if os.path.exists(cache_fp) and (time.time() - os.path.getmtime(cache_fp) < 3600):
+        try:
+            return json.load(open(cache_fp, "r", encoding="utf-8"))
+        except Exception:
+            pass
+
+    filters = "".join([f'["{k}"="{v}"]' for k, v in tags.items()])
+    box = f"{south},{west},{north},{east}"
+    ql = f"""
+    [out:json][timeout:{timeout_s}];
+    (
+      node{filters}({box});
+      way{filters}({box});
+      relation{filters}({box});
+    );
+    out center;
+    """
+    return _run_overpass(ql, cache_fp, timeout_s, raise_errors=True)
+
+def _run_overpass(ql: str, cache_fp: str, timeout_s: int, raise_errors: bool = False) -> List[Dict]:
+    # the HTTP client waits past the server-side [timeout:] so slow queries aren't cut short
     try:
-        r = requests.post(OVERPASS_URL, data={"data": ql}, timeout=30)
+        r = requests.post(OVERPASS_URL, data={"data": ql}, timeout=timeout_s + OVERPASS_CLIENT_GRACE_S)
         r.raise_for_status()
         data = r.json()
     except Exception:
+        if raise_errors:
+            raise
         return []
 
     pois: List[Dict] = []
@@ -232,6 +336,24 @@ def fetch_pois_overpass(lat: float, lon: float, radius_m: int, tags: Dict[str, s
         pass
     return pois
 
+def pois_within_radii(pois: List[Dict], lat: float, lon: float, radii: List[int]) -> Dict[int, List[Dict]]:
+    """
+    Split one POI fetch (at max(radii)) into cumulative per-radius lists, nearest first.
+    The largest radius keeps everything Overpass returned for it.
+    """
+    if not pois:
+        return {r: [] for r in radii}
+    plat = np.radians([q["lat"] for q in pois])
+    plon = np.radians([q["lon"] for q in pois])
+    lat0, lon0 = math.radians(lat), math.radians(lon)
+    a = np.sin((plat - lat0) / 2) ** 2 + math.cos(lat0) * np.cos(plat) * np.sin((plon - lon0) / 2) ** 2
+    dist = 2 * 6_371_000 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    order = np.argsort(dist, kind="stable")
+    ranked = [pois[i] for i in order]
+    ends = np.searchsorted(dist[order], radii, side="right")
+    r_max = max(radii)
+    return {r: (ranked if r == r_max else ranked[:int(n)]) for r, n in zip(radii, ends)}
+
 def competition_score_from_pois(pois: List[Dict], radius_m: int) -> int:
     """
     Convert POI count density (per km^2) into a 0..100 "competition" score.
@@ -246,78 +368,14 @@ def competition_score_from_pois(pois: List[Dict], radius_m: int) -> int:
 
 def risk_from_inputs(project_type: str, budget_lakh: float, seating: int,
                      hours_str: Optional[str], demand: int, competition: int) -> int:
-    prof = BUSINESS_PROFILES.get(_norm_project_key(project_type), BUSINESS_PROFILES["cafe"])
-    lo_b, hi_b = prof["typ_budget"]
-    lo_s, hi_s = prof["typ_seating"]
-
-    risk = 50
-    # budget vs typical
-    if budget_lakh < lo_b:
-        risk += 15
-    if budget_lakh > hi_b:
-        risk -= 10
-    # seating vs typical
-    if hi_s > 0:
-        if seating < lo_s:
-            risk += 10
-        if seating > hi_s:
-            risk += 5
-    # hours
-    try:
-        hspan = hours_str or "08:00-22:00"
-        start, end = hspan.split("-")
-        sh, eh = int(start.split(":")[0]), int(end.split(":")[0])
-        open_h = (eh - sh) % 24
-        if open_h >= 12:
-            risk += 8
-        if open_h >= 16:
-            risk += 5
-    except Exception:
-        pass
-    # demand & competition effects
-    if demand <= 40:
-        risk += 10
-    if competition >= 70:
-        risk += 12
-
-    return clamp(risk)
+    # single-point case of the vectorized rules (app/rules.py)
+    prof = rules.lookup_profile(PROFILE_TABLE, project_type)
+    return int(rules.risk_vec(prof, budget_lakh, seating, rules.parse_open_hours(hours_str), demand, competition))
 
 def make_pros_cons(project_type: str, demand: int, risk: int, competition: int,
                    city: Optional[str], radius_m: int) -> Tuple[List[str], List[str]]:
-    pros: List[str] = []
-    cons: List[str] = []
-
-    if demand >= 65:
-        pros.append("Strong local demand near the chosen spot.")
-    if competition <= 35:
-        pros.append("Low saturation—clear headroom for growth.")
-    if risk <= 40:
-        pros.append("Operational risk appears manageable.")
-
-    if demand < 45:
-        cons.append("Weak customer base; consider moving closer to footfall.")
-    if competition > 70:
-        cons.append("Heavy competition within the catchment.")
-    if risk > 65:
-        cons.append("Operational risk (budget, hours, or seasonality) is elevated.")
-
-    p = _norm_project_key(project_type)
-    if "cafe" in p:
-        if competition > 60:
-            cons.append("Many cafés nearby—focus on niche (breakfast/late-night).")
-        else:
-            pros.append("Cafe format fits student/office crowd in this area.")
-    if "gym" in p:
-        if demand >= 60:
-            pros.append("Good fitness interest; group classes could work.")
-    if "stationery" in p:
-        pros.append("Proximity to campus/offices favors stationery/print demand.")
-    if "hostel_mess" in p:
-        if demand >= 55:
-            pros.append("Student density favors mess/meal plans.")
-
-    pros.append(f"Radius {radius_m} m analyzed{(' in ' + city) if city else ''}.")
-    return pros, cons
+    masks = rules.pros_cons_masks(project_type, demand, risk, competition)
+    return rules.pros_cons_at(masks, (), city, radius_m)
 
 # ---- Payloads & Endpoints ----------------------------------------------------
 
@@ -328,6 +386,7 @@ class AnalyzePayload(BaseModel):
     lat: Optional[float] = None
     lon: Optional[float] = None
     radius_m: int = 500
+    radii: Optional[List[int]] = None  # optional sweep, e.g. [300, 500, 800, 1200]
     budget_lakh: float = 10.0
     seating_capacity: int = 0
     open_hours: Optional[str] = "08:00-22:00"
@@ -335,6 +394,22 @@ class AnalyzePayload(BaseModel):
     consider_competition: bool = True
     notes: Optional[str] = None
 
+class WhatIfPayload(BaseModel):
+    project_type: str
+    city: Optional[str] = None
+    address: Optional[str] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    radius_m: int = 500
+    # site scores; computed like /analyze when omitted
+    demand: Optional[int] = None
+    competition: Optional[int] = None
+    # grid axes; defaults span the profile's typical ranges
+    budgets_lakh: Optional[List[float]] = None
+    seating: Optional[List[int]] = None
+    open_hours: Optional[List[str]] = None
+    top_k: int = 10
+
 class PredictPayload(BaseModel):
     project_type: str
     city: str
@@ -345,31 +420,59 @@ class PredictPayload(BaseModel):
 
 @app.get("/")
 def root():
-    return {"ok": True, "service": "Sythesys API", "endpoints": ["/analyze", "/predict"]}
+    return {"ok": True, "service": "Sythesys API", "endpoints": ["/analyze", "/predict", "/heatmap", "/what-if", "/tiles/{z}/{x}/{y}.mvt"]}
+
+def resolve_location(address: Optional[str], city: Optional[str]) -> Optional[Dict]:
+    """Resolve address/city to lat/lon via the local gazetteer (no network)."""
+    if load_gazetteer is None or not (address or city):
+        return None
+    try:
+        gz = load_gazetteer(GAZETTEER_PATH)
+        return gz.resolve(address, city) if gz is not None else None
+    except Exception:
+        return None
 
 @app.post("/analyze")
-def analyze(p: AnalyzePayload):
+def analyze(p: AnalyzePayload, request: Request):
+    # 0) Geocode address/city when coordinates are missing
+    geocoded = None
+    if p.lat is None or p.lon is None:
+        geocoded = resolve_location(p.address, p.city)
+        if geocoded is not None:
+            p.lat, p.lon = geocoded["lat"], geocoded["lon"]
+
+    # Radii to evaluate: the main one plus an optional sweep, all from one fetch/read
+    radii = sorted({p.radius_m, *[int(r) for r in (p.radii or []) if r > 0]})
+    has_point = p.lat is not None and p.lon is not None
+
     # 1) Demand from raster (if available)
-    mean_den = None
-    if p.use_population_density and p.lat is not None and p.lon is not None:
-        mean_den = mean_density_from_raster(p.lat, p.lon, p.radius_m)
-    demand = density_to_score(mean_den)
+    means: Dict[int, Optional[float]] = {r: None for r in radii}
+    if p.use_population_density and has_point:
+        if len(radii) == 1:
+            means[p.radius_m] = mean_density_from_raster(p.lat, p.lon, p.radius_m)
+        else:
+            means = mean_density_multi(p.lat, p.lon, radii)
+    demands = {r: density_to_score(means[r]) for r in radii}
 
     # 2) Competition from OSM Overpass (optional)
-    comp = 45  # neutral mid
-    pois: List[Dict] = []
-    if p.consider_competition and p.lat is not None and p.lon is not None:
+    comps = {r: 45 for r in radii}  # neutral mid
+    pois_by_r: Dict[int, List[Dict]] = {r: [] for r in radii}
+    if p.consider_competition and has_point:
         try:
-            pois = fetch_pois_overpass(p.lat, p.lon, p.radius_m, tags_for_project_type(p.project_type))
-            comp = competition_score_from_pois(pois, p.radius_m)
+            fetched = fetch_pois_overpass(p.lat, p.lon, radii[-1], tags_for_project_type(p.project_type))
+            pois_by_r = {radii[0]: fetched} if len(radii) == 1 else pois_within_radii(fetched, p.lat, p.lon, radii)
+            comps = {r: competition_score_from_pois(pois_by_r[r], r) for r in radii}
         except Exception:
-            comp = 55  # safe fallback
+            comps = {r: 55 for r in radii}  # safe fallback
+
+    mean_den, demand, comp = means[p.radius_m], demands[p.radius_m], comps[p.radius_m]
+    pois = pois_by_r[p.radius_m]
 
     # 3) Risk from inputs + current scores
     risk = risk_from_inputs(p.project_type, p.budget_lakh, p.seating_capacity, p.open_hours, demand, comp)
 
     # 4) Narrative
-    label = BUSINESS_PROFILES.get(_norm_project_key(p.project_type), {}).get("label", "business")
+    label = BUSINESS_PROFILES.get(rules.norm_project_key(p.project_type), {}).get("label", "business")
     summary = (
         f"Feasibility for a {label.lower()} in {p.city or 'this area'}: "
         f"demand {demand}, risk {risk}, competition {comp}"
@@ -380,14 +483,237 @@ def analyze(p: AnalyzePayload):
     # Trim POIs if we return them (frontend can ignore or use later)
     pois_out = pois[:50] if pois else []
 
-    return {
+    out = {
         "summary": summary,
         "pros": pros,
         "cons": cons,
         "scores": {"demand": demand, "risk": risk, "competition": comp},
-        "debug": {"poi_count": len(pois), "mean_density": mean_den, "tif_used": mean_den is not None},
+        "debug": {"poi_count": len(pois), "mean_density": mean_den, "tif_used": mean_den is not None,
+                  "geocoded": geocoded},
         "pois": pois_out,  # optional; front-end can plot later
     }
+    if p.radii:
+        out["sweep"] = [
+            {
+                "radius_m": r,
+                "scores": {
+                    "demand": demands[r],
+                    "risk": risk_from_inputs(p.project_type, p.budget_lakh, p.seating_capacity,
+                                             p.open_hours, demands[r], comps[r]),
+                    "competition": comps[r],
+                },
+                "poi_count": len(pois_by_r[r]),
+                "mean_density": means[r],
+            }
+            for r in radii
+        ]
+    # Accept: Arrow / MessagePack → POIs as columns, everything else in meta
+    columnar = columnar_response(request, {k: [q.get(k) for q in pois_out] for k in ("lat", "lon", "name", "type")},
+                                 {k: v for k, v in out.items() if k != "pois"})
+    return columnar if columnar is not None else out
+
+WHATIF_MAX_COMBOS = 250_000
+WHATIF_DEFAULT_HOURS = ["09:00-18:00", "08:00-20:00", "08:00-22:00", "07:00-23:00", "06:00-24:00"]
+
+@app.post("/what-if")
+def what_if(p: WhatIfPayload, request: Request):
+    """
+    Risk surface over budget × seating × open-hours for one site, plus the best configurations.
+    Uses the vectorized rules (app/rules.py); site demand/competition are computed once.
+    """
+    prof = rules.lookup_profile(PROFILE_TABLE, p.project_type)
+
+    if p.lat is None or p.lon is None:
+        loc = resolve_location(p.address, p.city)
+        if loc is not None:
+            p.lat, p.lon = loc["lat"], loc["lon"]
+    has_point = p.lat is not None and p.lon is not None
+
+    demand = p.demand
+    if demand is None:
+        demand = density_to_score(mean_density_from_raster(p.lat, p.lon, p.radius_m) if has_point else None)
+    comp = p.competition
+    if comp is None:
+        comp = 45
+        if has_point:
+            try:
+                comp = competition_score_from_pois(
+                    fetch_pois_overpass(p.lat, p.lon, p.radius_m, tags_for_project_type(p.project_type)), p.radius_m)
+            except Exception:
+                comp = 55
+
+    budgets = np.asarray(p.budgets_lakh if p.budgets_lakh else
+                         np.linspace(0.5 * prof.lo_b, 1.5 * prof.hi_b, 41).round(1), dtype=np.float64)
+    seats = np.asarray(p.seating if p.seating else
+                       (np.linspace(0, 1.5 * prof.hi_s, 31).round() if prof.hi_s > 0 else [0]), dtype=np.int64)
+    hours = list(p.open_hours) if p.open_hours else WHATIF_DEFAULT_HOURS
+    if budgets.size * seats.size * len(hours) > WHATIF_MAX_COMBOS:
+        raise HTTPException(status_code=400, detail=f"grid larger than {WHATIF_MAX_COMBOS} combinations")
+
+    open_h = np.array([rules.parse_open_hours(h) for h in hours])
+    risk = rules.risk_vec(prof, budgets[:, None, None], seats[None, :, None], open_h[None, None, :], demand, comp)
+
+    # best = lowest risk, then cheapest, then fewest seats / shortest hours (grid order)
+    flat = risk.ravel()
+    b_idx, s_idx, h_idx = np.unravel_index(np.arange(flat.size), risk.shape)
+    order = np.lexsort((h_idx, s_idx, budgets[b_idx], flat))[:max(0, p.top_k)]
+    masks = rules.pros_cons_masks(p.project_type, demand, flat, comp)
+    best = []
+    for i in order:
+        pros, cons = rules.pros_cons_at(masks, i, p.city, p.radius_m)
+        best.append({
+            "budget_lakh": float(budgets[b_idx[i]]),
+            "seating_capacity": int(seats[s_idx[i]]),
+            "open_hours": hours[h_idx[i]],
+            "risk": int(flat[i]),
+            "pros": pros,
+            "cons": cons,
+        })
+
+    out = {
+        "scores": {"demand": demand, "competition": comp},
+        "axes": {"budget_lakh": budgets, "seating_capacity": seats, "open_hours": hours},
+        "risk": risk,  # [budget][seating][hours]
+        "best": best,
+    }
+    # Accept: Arrow / MessagePack → the surface as one row per combination
+    columnar = columnar_response(request, {
+        "budget_lakh": budgets[b_idx], "seating_capacity": seats[s_idx],
+        "open_hours": np.asarray(hours)[h_idx], "risk": flat,
+    }, {k: v for k, v in out.items() if k != "risk"})
+    # ndarrays go straight to the encoder (no jsonable_encoder pass over the surface)
+    return columnar if columnar is not None else FastJSONResponse(out)
+
+HEATMAP_MAX_SPAN_DEG = 0.5  # ~50 km; keeps Overpass bbox queries and FFT sizes sane
+HEATMAP_MAX_RADIUS_M = 5000  # bounds the raster halo read around the bbox
+
+@app.get("/heatmap")
+def heatmap(
+    request: Request,
+    bbox: str = Query(..., description="west,south,east,north in EPSG:4326"),
+    radius_m: int = Query(500, gt=0, le=HEATMAP_MAX_RADIUS_M),
+    project_type: str = "cafe",
+    consider_competition: bool = True,
+    format: str = Query("json", pattern="^(json|png|f32)$"),
+):
+    """
+    Catchment-mean demand and competitor density for every pixel of bbox in one pass.
+    - json: demand/competition scores (0..100) as row-major lists, north row first
+    - png : RGBA image, R=demand, G=competition (0..100 → 0..255), A=data present
+    - f32 : raw float32 planes [mean_density, competitor_count], little-endian, row-major
+    With format=json, Accept: application/vnd.apache.arrow.stream or application/x-msgpack
+    returns the same rows as columns (demand, competition) with the rest as metadata.
+    Grid shape and bounds are also sent as X-Grid-Shape / X-Grid-Bounds headers.
+    If the Overpass query fails, competition falls back to 55 (counts NaN), debug.poi_error
+    / X-POI-Error say why and debug.poi_count is null.
+    """
+    try:
+        west, south, east, north = (float(v) for v in bbox.split(","))
+    except Exception:
+        raise HTTPException(status_code=400, detail="bbox must be 'west,south,east,north'")
+    if not (west < east and south < north):
+        raise HTTPException(status_code=400, detail="bbox is empty")
+    if max(east - west, north - south) > HEATMAP_MAX_SPAN_DEG:
+        raise HTTPException(status_code=400, detail=f"bbox wider than {HEATMAP_MAX_SPAN_DEG} degrees")
+    box = (west, south, east, north)
+
+    grid = None
+    tif_path = os.getenv("POP_TIF_PATH", "")
+    if tif_path and os.path.exists(tif_path):
+        try:
+            grid = heatmap_mod.grid_from_raster(tif_path, box, radius_m)
+        except Exception:
+            grid = None
+    if grid is None:
+        grid = heatmap_mod.grid_without_raster(box, radius_m)
+
+    pois: List[Dict] = []
+    poi_error: Optional[str] = None
+    if consider_competition:
+        # halo so pixels near the edge still see competitors just outside the bbox
+        dlat = radius_m / 110_540
+        dlon = radius_m / (111_320 * math.cos(math.radians((south + north) / 2.0)))
+        try:
+            pois = fetch_pois_overpass_bbox((west - dlon, south - dlat, east + dlon, north + dlat),
+                                            tags_for_project_type(project_type))
+        except Exception as e:
+            poi_error = f"{type(e).__name__}: {e}"
+
+    mean, counts = heatmap_mod.compute_surfaces(grid, pois)
+    try:
+        max_val = float(os.getenv("POP_MAX_DENSITY", "5000"))
+    except Exception:
+        max_val = 5000.0
+    demand = heatmap_mod.density_scores(mean, counts.shape, max_val)
+    comp = heatmap_mod.competition_scores(counts, radius_m)
+    if not consider_competition:
+        comp = np.full(counts.shape, 45, dtype=np.uint8)  # same neutral as /analyze
+    elif poi_error is not None:
+        comp = np.full(counts.shape, 55, dtype=np.uint8)  # same fallback as /analyze
+        counts = np.full(counts.shape, np.nan)
+
+    h, w = counts.shape
+    headers = {"X-Grid-Shape": f"{h},{w}", "X-Grid-Bounds": f"{west},{south},{east},{north}"}
+    if poi_error is not None:
+        headers["X-POI-Error"] = poi_error.replace("\n", " ")[:200].encode("ascii", "replace").decode()
+    if format == "png":
+        valid = np.isfinite(mean) if mean is not None else np.ones(counts.shape, dtype=bool)
+        return Response(heatmap_mod.scores_to_png(demand, comp, valid), media_type="image/png", headers=headers)
+    if format == "f32":
+        dens = mean if mean is not None else np.full(counts.shape, np.nan)
+        body = np.stack([dens, counts]).astype("<f4").tobytes()
+        return Response(body, media_type="application/octet-stream", headers=headers)
+
+    meta = {
+        "bounds": [west, south, east, north],
+        "shape": [h, w],
+        "radius_m": radius_m,
+        "project_type": project_type,
+        "debug": {"poi_count": None if poi_error else len(pois), "tif_used": mean is not None,
+                  "poi_error": poi_error},
+    }
+    columns = {"demand": demand.ravel(), "competition": comp.ravel()}
+    columnar = columnar_response(request, columns, meta, headers)
+    if columnar is not None:
+        return columnar
+    body = {k: v for k, v in meta.items() if k != "debug"}
+    body.update(columns)
+    body["debug"] = meta["debug"]
+    return FastJSONResponse(body, headers=headers)
+
+# ---- Vector tiles ------------------------------------------------------------
+
+TILE_PYRAMID_PATH = os.getenv("TILE_PYRAMID_PATH", os.path.join(_ROOT, "data", "processed", "opportunity_pyramid.npz"))
+TILE_CACHE = tiles.DiskLRU(os.path.join(os.path.dirname(__file__), "..", "cache", "tiles"),
+                           int(float(os.getenv("TILE_CACHE_MAX_MB", "256")) * 1024 * 1024))
+TILE_PROPS = ["pop", "comp_density", "score", "count"]
+
+@app.get("/tiles/{z}/{x}/{y}.mvt")
+def vector_tile(z: int, x: int, y: int, category: str = "cafe"):
+    """
+    MVT tile (layer "opportunity") for one category. The zoom picks the H3 level;
+    parent cells carry pop / comp_density sums, mean score and the fine-cell count.
+    Build the pyramid first: python scripts/build_tiles.py
+    """
+    if not (0 <= z <= 22 and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=400, detail="tile out of range")
+    pyr = tiles.load_pyramid(TILE_PYRAMID_PATH)
+    if pyr is None:
+        raise HTTPException(status_code=503, detail="tile pyramid not built (scripts/build_tiles.py)")
+    levels = pyr.levels.get(category)
+    if levels is None:
+        raise HTTPException(status_code=404, detail=f"unknown category; have {pyr.categories()}")
+
+    headers = {"Cache-Control": "public, max-age=3600"}
+    rel = os.path.join(f"{int(pyr.mtime)}", category, str(z), str(x), f"{y}.mvt")
+    data = TILE_CACHE.get(rel)
+    if data is None:
+        level = levels[tiles.res_for_zoom(z, list(levels))]
+        data = tiles.encode_tile(level, z, x, y, TILE_PROPS)
+        TILE_CACHE.put(rel, data)
+    if not data:
+        return Response(status_code=204, headers=headers)
+    return Response(data, media_type="application/vnd.mapbox-vector-tile", headers=headers)
 
 @app.post("/predict")
 def predict(p: PredictPayload):
@@ -0,0 +1,229 @@
+"""
+Response layer: fast JSON, size-gated compression and columnar formats.
+
+- FastJSONResponse: orjson when installed (numpy-aware), stdlib json otherwise.
+- CompressionMiddleware: brotli (if installed) or gzip for bodies above a threshold,
+  whichever the client's Accept-Encoding rates highest.
+- columnar_response(): Arrow IPC stream or MessagePack for multi-row results, only
+  when the client's Accept rates it above JSON; everyone else keeps the JSON contract.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+try:
+    import brotli
+except Exception:
+    brotli = None
+
+try:
+    import msgpack
+except Exception:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except Exception:
+    pa = None
+
+ARROW_MEDIA = "application/vnd.apache.arrow.stream"
+MSGPACK_MEDIA = "application/x-msgpack"
+_MSGPACK_ALIASES = (MSGPACK_MEDIA, "application/msgpack", "application/vnd.msgpack")
+
+COMPRESS_MIN_BYTES = 1024
+# already-compressed payloads gain nothing from another pass
+_SKIP_TYPES = ("image/", "application/zip", "application/gzip")
+
+# ---- JSON --------------------------------------------------------------------
+
+def _default(o: Any):
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    if isinstance(o, np.generic):
+        return o.item()
+    raise TypeError(f"{type(o).__name__} is not JSON serializable")
+
+class FastJSONResponse(JSONResponse):
+    """Drop-in JSONResponse; also serializes numpy arrays/scalars."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default,
+                                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+# ---- Columnar ----------------------------------------------------------------
+
+def _parse_qlist(header: str) -> Dict[str, float]:
+    """`a;q=0.5, b` → {"a": 0.5, "b": 1.0} (lower-cased; a malformed q counts as 0)."""
+    out: Dict[str, float] = {}
+    for part in header.lower().split(","):
+        bits = part.strip().split(";")
+        if not bits[0].strip():
+            continue
+        q = 1.0
+        for b in bits[1:]:
+            b = b.strip()
+            if b.startswith("q="):
+                try:
+                    q = min(max(float(b[2:]), 0.0), 1.0)
+                except ValueError:
+                    q = 0.0
+        out[bits[0].strip()] = q
+    return out
+
+def wanted_columnar(request: Request) -> Optional[str]:
+    """
+    ARROW_MEDIA / MSGPACK_MEDIA when the Accept header rates one we can produce above JSON.
+    JSON is matched by application/json, application/* or */* (most specific range wins)
+    and takes ties, so only an explicitly listed columnar type can beat it.
+    """
+    accept = request.headers.get("accept")
+    if not accept:
+        return None
+    ranges = _parse_qlist(accept)
+    json_q = next((ranges[m] for m in ("application/json", "application/*", "*/*") if m in ranges), 0.0)
+    offers = []
+    if pa is not None:
+        offers.append((ranges.get(ARROW_MEDIA, 0.0), ARROW_MEDIA))
+    if msgpack is not None:
+        offers.append((max(ranges.get(m, 0.0) for m in _MSGPACK_ALIASES), MSGPACK_MEDIA))
+    q, media = max(offers, key=lambda o: o[0], default=(0.0, None))
+    return media if q > 0 and q > json_q else None
+
+def _column(values):
+    """Numeric/str columns as ndarrays; anything else (None, nested lists) stays a list."""
+    if isinstance(values, np.ndarray) and values.dtype != object:
+        return values
+    try:
+        arr = np.asarray(values) if len(values) else np.asarray([], dtype=np.float64)
+    except ValueError:  # ragged nested lists
+        return list(values)
+    return arr if arr.ndim == 1 and arr.dtype.kind in "biufU" else list(values)
+
+def columnar_response(request: Request, columns: Mapping[str, Any], meta: Optional[Dict] = None,
+                      headers: Optional[Dict[str, str]] = None) -> Optional[Response]:
+    """
+    Encode equal-length columns as Arrow IPC (schema metadata["meta"] = JSON meta)
+    or MessagePack ({"meta": ..., "columns": {name: {"dtype", "shape", "data"}}}).
+    Returns None when the client did not ask for a columnar format.
+    """
+    media = wanted_columnar(request)
+    if media is None:
+        return None
+    meta_json = json.dumps(meta or {}, default=_default)
+
+    if media == ARROW_MEDIA:
+        arrays = {}
+        for k, v in columns.items():
+            arr = pa.array(_column(v))
+            # repeated labels (e.g. open_hours per combination) → dictionary-encoded
+            arrays[k] = arr.dictionary_encode() if pa.types.is_string(arr.type) else arr
+        table = pa.table(arrays)
+        table = table.replace_schema_metadata({"meta": meta_json})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return Response(sink.getvalue().to_pybytes(), media_type=ARROW_MEDIA, headers=headers)
+
+    cols = {}
+    for k, v in columns.items():
+        arr = _column(v)
+        if isinstance(arr, np.ndarray) and arr.dtype.kind in "biuf":
+            arr = np.ascontiguousarray(arr)
+            cols[k] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "data": arr.tobytes()}
+        else:
+            cols[k] = arr.tolist() if isinstance(arr, np.ndarray) else arr
+    body = msgpack.packb({"meta": json.loads(meta_json), "columns": cols}, use_bin_type=True)
+    return Response(body, media_type=MSGPACK_MEDIA, headers=headers)
+
+# ---- Compression -------------------------------------------------------------
+
+def _pick_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Highest-q encoding we support ("br" only with brotli installed), br before gzip on ties.
+    "*" covers encodings not listed; q=0 refuses. None means send the body as-is,
+    also when identity is rated above every supported encoding.
+    """
+    offered = _parse_qlist(accept_encoding)
+    star = offered.get("*")
+    best, best_q = None, 0.0
+    for enc in (("br", "gzip") if brotli is not None else ("gzip",)):
+        q = offered.get(enc, star or 0.0)
+        if q > best_q:
+            best, best_q = enc, q
+    if best is not None and offered.get("identity", star if star is not None else 0.0) > best_q:
+        return None
+    return best
+
+class CompressionMiddleware:
+    """
+    ASGI middleware: brotli/gzip for single-message bodies >= minimum_size.
+    Streaming responses (more_body) and images are passed through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _pick_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Dict[str, Any] = {}
+        passthrough = False
+
+        async def wrapped_send(message):
+            nonlocal passthrough
+            if message["type"] == "http.response.start":
+                start.update(message)
+                h = Headers(raw=message.get("headers", []))
+                ctype = h.get("content-type", "")
+                if "content-encoding" in h or ctype.startswith(_SKIP_TYPES):
+                    passthrough = True
+                    await send(message)
+                return
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] != "http.response.body" or message.get("more_body", False):
+                # streaming (or pathsend) response: forward as it comes, uncompressed
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=list(start.get("headers", [])))
+            if len(body) >= self.minimum_size:
+                if encoding == "br":
+                    body = brotli.compress(body, quality=self.brotli_quality)
+                else:
+                    body = gzip.compress(body, compresslevel=self.gzip_level)
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("accept-encoding")
+            headers["content-length"] = str(len(body))
+            start["headers"] = headers.raw
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, wrapped_send)
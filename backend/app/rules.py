@@ -0,0 +1,103 @@
+"""
+Risk and pros/cons rules for /analyze and /what-if, vectorized over NumPy arrays.
+
+Profiles are compiled once into plain tuples and open-hours strings are parsed
+once (cached), so the same rules can be evaluated over NumPy arrays of
+(budget, seating, open hours, demand, competition), e.g. for the /what-if sweep.
+main.risk_from_inputs / make_pros_cons are the single-point case of these rules;
+backend/tests/test_rules.py checks them against the original scalar rules.
+"""
+
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+class CompiledProfile(NamedTuple):
+    key: str
+    label: str
+    lo_b: float
+    hi_b: float
+    lo_s: float
+    hi_s: float
+
+def norm_project_key(name: str) -> str:
+    return (name or "").strip().lower().replace(" ", "_")
+
+def compile_profiles(profiles: Dict[str, Dict]) -> Dict[str, CompiledProfile]:
+    return {
+        k: CompiledProfile(k, v["label"], *v["typ_budget"], *v["typ_seating"])
+        for k, v in profiles.items()
+    }
+
+def lookup_profile(table: Dict[str, CompiledProfile], project_type: str) -> CompiledProfile:
+    return table.get(norm_project_key(project_type), table["cafe"])
+
+@lru_cache(maxsize=1024)
+def parse_open_hours(hours_str: Optional[str]) -> float:
+    """Opening span in hours, NaN when the string can't be parsed (rule is then skipped)."""
+    try:
+        hspan = hours_str or "08:00-22:00"
+        start, end = hspan.split("-")
+        sh, eh = int(start.split(":")[0]), int(end.split(":")[0])
+        return float((eh - sh) % 24)
+    except Exception:
+        return math.nan
+
+# ---- Risk --------------------------------------------------------------------
+
+def risk_vec(prof: CompiledProfile, budget_lakh, seating, open_h, demand, competition) -> np.ndarray:
+    """Risk score (0..100); inputs broadcast, `open_h` from parse_open_hours."""
+    b, s, h, d, c = np.broadcast_arrays(
+        np.asarray(budget_lakh, dtype=np.float64), np.asarray(seating, dtype=np.float64),
+        np.asarray(open_h, dtype=np.float64), np.asarray(demand, dtype=np.float64),
+        np.asarray(competition, dtype=np.float64),
+    )
+    risk = np.full(b.shape, 50, dtype=np.int64)
+    # budget vs typical
+    risk += 15 * (b < prof.lo_b) - 10 * (b > prof.hi_b)
+    # seating vs typical
+    if prof.hi_s > 0:
+        risk += 10 * (s < prof.lo_s) + 5 * (s > prof.hi_s)
+    # hours (NaN compares False → no contribution, like the scalar except-branch)
+    with np.errstate(invalid="ignore"):
+        risk += 8 * (h >= 12) + 5 * (h >= 16)
+    # demand & competition effects
+    risk += 10 * (d <= 40) + 12 * (c >= 70)
+    return np.clip(risk, 0, 100)
+
+# ---- Pros / cons ------------------------------------------------------------
+
+# (kind, project substring or None, text, predicate(demand, risk, competition)), in output order
+Rule = Tuple[str, Optional[str], str, Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]]
+
+PROS_CONS_RULES: List[Rule] = [
+    ("pro", None, "Strong local demand near the chosen spot.", lambda d, r, c: d >= 65),
+    ("pro", None, "Low saturation—clear headroom for growth.", lambda d, r, c: c <= 35),
+    ("pro", None, "Operational risk appears manageable.", lambda d, r, c: r <= 40),
+    ("con", None, "Weak customer base; consider moving closer to footfall.", lambda d, r, c: d < 45),
+    ("con", None, "Heavy competition within the catchment.", lambda d, r, c: c > 70),
+    ("con", None, "Operational risk (budget, hours, or seasonality) is elevated.", lambda d, r, c: r > 65),
+    ("con", "cafe", "Many cafés nearby—focus on niche (breakfast/late-night).", lambda d, r, c: c > 60),
+    ("pro", "cafe", "Cafe format fits student/office crowd in this area.", lambda d, r, c: c <= 60),
+    ("pro", "gym", "Good fitness interest; group classes could work.", lambda d, r, c: d >= 60),
+    ("pro", "stationery", "Proximity to campus/offices favors stationery/print demand.", lambda d, r, c: np.ones_like(d, dtype=bool)),
+    ("pro", "hostel_mess", "Student density favors mess/meal plans.", lambda d, r, c: d >= 55),
+]
+
+def pros_cons_masks(project_type: str, demand, risk, competition) -> List[Tuple[str, str, np.ndarray]]:
+    """[(kind, text, mask)] for every rule that applies to this project type."""
+    p = norm_project_key(project_type)
+    d, r, c = np.broadcast_arrays(np.asarray(demand), np.asarray(risk), np.asarray(competition))
+    return [(kind, text, np.asarray(pred(d, r, c), dtype=bool))
+            for kind, proj, text, pred in PROS_CONS_RULES if proj is None or proj in p]
+
+def pros_cons_at(masks: List[Tuple[str, str, np.ndarray]], idx, city: Optional[str], radius_m: int) -> Tuple[List[str], List[str]]:
+    """Materialize the text lists for one element (`idx` into the mask arrays)."""
+    pros = [t for k, t, m in masks if k == "pro" and m[idx]]
+    cons = [t for k, t, m in masks if k == "con" and m[idx]]
+    pros.append(f"Radius {radius_m} m analyzed{(' in ' + city) if city else ''}.")
+    return pros, cons
@@ -0,0 +1,231 @@
+"""
+Mapbox Vector Tiles over the precomputed opportunity hex pyramid.
+
+scripts/build_tiles.py aggregates data/processed/opportunity.geojson into parent
+H3 cells per category (pop sum, competition sum, mean score) and stores each
+level with its boundaries in one .npz. Here a tile request picks the H3 level for
+its zoom, selects the cells overlapping the tile, and encodes them as MVT
+(hand-rolled protobuf, no extra dependency). Encoded tiles are kept in an LRU
+directory on disk.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+EXTENT = 4096
+BUFFER_PX = 64          # in EXTENT units; features slightly past the edge avoid seams
+LAYER = "opportunity"
+
+# Web-map zoom → H3 resolution (hexes stay ~10-40 px wide); clamped to the pyramid's levels
+ZOOM_TO_RES = [(8, 5), (10, 6), (11, 7), (13, 8), (15, 9), (99, 10)]
+
+def res_for_zoom(z: int, levels: List[int]) -> int:
+    res = next(r for zmax, r in ZOOM_TO_RES if z <= zmax)
+    return max(min(res, max(levels)), min(levels))
+
+# ---- Pyramid -----------------------------------------------------------------
+
+class Pyramid:
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        data = np.load(path)
+        self.levels: Dict[str, Dict[int, Dict[str, np.ndarray]]] = {}
+        for key in data.files:
+            cat, res, name = key.split("/")
+            self.levels.setdefault(cat, {}).setdefault(int(res), {})[name] = data[key]
+
+    def categories(self) -> List[str]:
+        return sorted(self.levels)
+
+_PYRAMID: Optional[Pyramid] = None
+_PYRAMID_LOCK = threading.Lock()
+
+def load_pyramid(path: str) -> Optional[Pyramid]:
+    """Load once; reload when the file on disk changes."""
+    global _PYRAMID
+    if not os.path.exists(path):
+        return None
+    with _PYRAMID_LOCK:
+        if _PYRAMID is None or _PYRAMID.path != path or _PYRAMID.mtime != os.path.getmtime(path):
+            _PYRAMID = Pyramid(path)
+        return _PYRAMID
+
+# ---- Tile geometry -----------------------------------------------------------
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(west, south, east, north) of an XYZ tile in degrees."""
+    n = 2 ** z
+    def lat(yy: float) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * yy / n))))
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+def _to_tile_px(lon: np.ndarray, lat: np.ndarray, z: int, x: int, y: int) -> Tuple[np.ndarray, np.ndarray]:
+    n = 2 ** z
+    lat_r = np.radians(np.clip(lat, -85.0511, 85.0511))
+    gx = (lon + 180.0) / 360.0 * n
+    gy = (1.0 - np.log(np.tan(lat_r) + 1.0 / np.cos(lat_r)) / math.pi) / 2.0 * n
+    return np.rint((gx - x) * EXTENT).astype(np.int64), np.rint((gy - y) * EXTENT).astype(np.int64)
+
+# ---- Minimal MVT (protobuf) encoder ------------------------------------------
+
+def _varint(v: int) -> bytes:
+    out = bytearray()
+    while True:
+        b = v & 0x7F
+        v >>= 7
+        if v:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+def _field(num: int, wire: int) -> bytes:
+    return _varint((num << 3) | wire)
+
+def _bytes_field(num: int, payload: bytes) -> bytes:
+    return _field(num, 2) + _varint(len(payload)) + payload
+
+def _packed(num: int, values: List[int]) -> bytes:
+    return _bytes_field(num, b"".join(_varint(v) for v in values))
+
+def _zigzag(v: int) -> int:
+    return (v << 1) ^ (v >> 63)
+
+def _ring_commands(xs: np.ndarray, ys: np.ndarray, cursor: List[int]) -> List[int]:
+    # MVT exterior rings are clockwise in tile space (positive shoelace area, y down)
+    area = float(np.dot(xs, np.roll(ys, -1)) - np.dot(np.roll(xs, -1), ys))
+    if area < 0:
+        xs, ys = xs[::-1], ys[::-1]
+    cmds = [(1 << 3) | 1]  # MoveTo, 1 point
+    cmds += [_zigzag(int(xs[0]) - cursor[0]), _zigzag(int(ys[0]) - cursor[1])]
+    cmds.append(((len(xs) - 1) << 3) | 2)  # LineTo
+    for i in range(1, len(xs)):
+        cmds += [_zigzag(int(xs[i] - xs[i - 1])), _zigzag(int(ys[i] - ys[i - 1]))]
+    cursor[0], cursor[1] = int(xs[-1]), int(ys[-1])
+    cmds.append((1 << 3) | 7)  # ClosePath
+    return cmds
+
+def _value(v) -> bytes:
+    if isinstance(v, str):
+        return _bytes_field(1, v.encode("utf-8"))
+    return _field(3, 1) + struct.pack("<d", float(v))  # double_value
+
+def encode_tile(level: Dict[str, np.ndarray], z: int, x: int, y: int, props: List[str]) -> bytes:
+    """Encode the cells of one pyramid level that overlap tile z/x/y."""
+    w, s, e, n = tile_bounds(z, x, y)
+    pad_lon = (e - w) * BUFFER_PX / EXTENT
+    pad_lat = (n - s) * BUFFER_PX / EXTENT
+    hit = np.nonzero((level["maxlon"] >= w - pad_lon) & (level["minlon"] <= e + pad_lon) &
+                     (level["maxlat"] >= s - pad_lat) & (level["minlat"] <= n + pad_lat))[0]
+    if hit.size == 0:
+        return b""
+
+    # project only the vertices of the selected cells, in one pass
+    offsets = level["offsets"]
+    counts = offsets[hit + 1] - offsets[hit]
+    starts = np.concatenate(([0], np.cumsum(counts)))
+    vidx = np.repeat(offsets[hit] - starts[:-1], counts) + np.arange(starts[-1])
+    px, py = _to_tile_px(level["lon"][vidx], level["lat"][vidx], z, x, y)
+
+    keys = props + ["h3"]
+    values: "OrderedDict[object, int]" = OrderedDict()
+    features = []
+    for j, i in enumerate(hit):
+        xs, ys = px[starts[j]:starts[j + 1]], py[starts[j]:starts[j + 1]]
+        keep = np.ones(xs.size, dtype=bool)
+        keep[1:] = (np.diff(xs) != 0) | (np.diff(ys) != 0)
+        xs, ys = xs[keep], ys[keep]
+        if xs.size > 1 and xs[-1] == xs[0] and ys[-1] == ys[0]:
+            xs, ys = xs[:-1], ys[:-1]  # ClosePath implies the last edge
+        if xs.size < 3:
+            continue  # collapses below tile resolution
+
+        tags: List[int] = []
+        for k_i, k in enumerate(keys):
+            v = format(int(level["ids"][i]), "x") if k == "h3" else round(float(level[k][i]), 4)
+            if isinstance(v, float) and not math.isfinite(v):
+                continue
+            tags += [k_i, values.setdefault(v, len(values))]
+        geom = _ring_commands(xs, ys, [0, 0])
+        features.append(_field(1, 0) + _varint(int(i) + 1)
+                        + _packed(2, tags)
+                        + _field(3, 0) + _varint(3)  # POLYGON
+                        + _packed(4, geom))
+    if not features:
+        return b""
+
+    layer = (_field(15, 0) + _varint(2)
+             + _bytes_field(1, LAYER.encode())
+             + b"".join(_bytes_field(2, f) for f in features)
+             + b"".join(_bytes_field(3, k.encode()) for k in keys)
+             + b"".join(_bytes_field(4, _value(v)) for v in values)
+             + _field(5, 0) + _varint(EXTENT))
+    return _bytes_field(3, layer)
+
+# ---- Disk LRU ---------------------------------------------------------------
+
+class DiskLRU:
+    """Files under `root`, evicted least-recently-used first once over `max_bytes`."""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        entries = []
+        for dirpath, _, files in os.walk(root):
+            for fn in files:
+                fp = os.path.join(dirpath, fn)
+                st = os.stat(fp)
+                entries.append((st.st_mtime, fp, st.st_size))
+        for _, fp, size in sorted(entries):
+            self._index[fp] = size
+            self._total += size
+
+    def get(self, rel: str) -> Optional[bytes]:
+        fp = os.path.join(self.root, rel)
+        with self._lock:
+            if fp not in self._index:
+                return None
+            self._index.move_to_end(fp)
+        try:
+            with open(fp, "rb") as f:
+                data = f.read()
+            os.utime(fp)  # recency survives restarts
+            return data
+        except OSError:
+            with self._lock:
+                self._total -= self._index.pop(fp, 0)
+            return None
+
+    def put(self, rel: str, data: bytes) -> None:
+        fp = os.path.join(self.root, rel)
+        try:
+            os.makedirs(os.path.dirname(fp), exist_ok=True)
+            tmp = f"{fp}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, fp)
+        except OSError:
+            return
+        with self._lock:
+            self._total += len(data) - self._index.pop(fp, 0)
+            self._index[fp] = len(data)
+            while self._total > self.max_bytes and len(self._index) > 1:
+                old, size = self._index.popitem(last=False)
+                self._total -= size
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
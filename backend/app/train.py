@@ -1,11 +1,12 @@
+import os, time
 from pathlib import Path
-import joblib, pandas as pd
+import joblib, numpy as np, pandas as pd
 from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import OneHotEncoder
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from sklearn.pipeline import Pipeline
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.metrics import classification_report
-from features import CAT_FEATURES, NUM_FEATURES, ALL_FEATURES
+from features import CAT_FEATURES, NUM_FEATURES, ALL_FEATURES, DEFAULTS
 
 ROOT = Path(__file__).resolve().parents[1].parents[0]
 DATA_DIR = ROOT / "data"
@@ -13,24 +14,135 @@ CACHE_DIR = Path(__file__).resolve().parents[1] / "cache"
 TRAIN_CSV = DATA_DIR / "training.csv"
 MODEL_PATH = CACHE_DIR / "model.joblib"
 
+# Streaming mode (TRAIN_STREAM=1): out-of-core fit over chunked CSV / Parquet
+TRAIN_STREAM = os.getenv("TRAIN_STREAM", "0") == "1"
+TRAIN_PATH = Path(os.getenv("TRAIN_PATH", str(TRAIN_CSV)))
+CHUNK_ROWS = int(os.getenv("TRAIN_CHUNK_ROWS", "200000"))
+VAL_FRAC = float(os.getenv("TRAIN_VAL_FRAC", "0.1"))
+EPOCHS = int(os.getenv("TRAIN_EPOCHS", "3"))
+
+def _peak_mem_mb():
+    try:
+        import resource, sys
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+    except Exception:
+        return None  # e.g. Windows
+
+def _iter_chunks(path: Path, chunk_rows: int):
+    """Yield (global_row_offset, DataFrame) chunks of the training columns."""
+    cols = ALL_FEATURES + ["label"]
+    if path.suffix.lower() in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+        batches = (b.to_pandas() for b in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=cols))
+    else:
+        batches = pd.read_csv(path, usecols=cols, chunksize=chunk_rows)
+    offset = 0
+    for df in batches:
+        yield offset, _prep(df)
+        offset += len(df)
+
+def _prep(df: pd.DataFrame) -> pd.DataFrame:
+    # same fill values as features.to_dataframe() at inference time
+    for c in CAT_FEATURES:
+        df[c] = df[c].fillna("unknown").astype(str)
+    for c in NUM_FEATURES:
+        df[c] = pd.to_numeric(df[c], errors="coerce").fillna(DEFAULTS[c])
+    return df.dropna(subset=["label"])
+
+def _is_val(offset: int, df: pd.DataFrame) -> np.ndarray:
+    # deterministic hash of the row number → same split on every pass
+    idx = (np.arange(len(df), dtype=np.uint64) + np.uint64(offset)) * np.uint64(2654435761)
+    return (idx % np.uint64(1 << 32)).astype(np.float64) / float(1 << 32) < VAL_FRAC
+
+def train_streaming(path: Path = TRAIN_PATH) -> Pipeline:
+    t0 = time.perf_counter()
+
+    # Pass 1: category vocabulary, label set and numeric scaling stats (train rows only)
+    vocab = {c: set() for c in CAT_FEATURES}
+    classes = set()
+    scaler = StandardScaler()
+    first = None
+    n_rows = 0
+    for offset, df in _iter_chunks(path, CHUNK_ROWS):
+        n_rows += len(df)
+        tr = df[~_is_val(offset, df)]
+        if tr.empty:
+            continue
+        for c in CAT_FEATURES:
+            vocab[c].update(tr[c].unique())
+        classes.update(tr["label"].astype(int).unique())
+        scaler.partial_fit(tr[NUM_FEATURES])
+        if first is None:
+            first = tr.head(1000)
+    if first is None:
+        raise SystemExit(f"[train] No training rows in {path}")
+    print(f"[train] pass 1: {n_rows} rows, vocab sizes {{{', '.join(f'{c}: {len(v)}' for c, v in vocab.items())}}}")
+
+    pre = ColumnTransformer([
+        ("cat", OneHotEncoder(categories=[sorted(vocab[c]) for c in CAT_FEATURES], handle_unknown="ignore"), CAT_FEATURES),
+        ("num", StandardScaler(), NUM_FEATURES),
+    ]).fit(first[ALL_FEATURES])
+    # swap in the full-data scaling stats from pass 1
+    num = pre.named_transformers_["num"]
+    for attr in ("mean_", "var_", "scale_", "n_samples_seen_"):
+        setattr(num, attr, getattr(scaler, attr))
+
+    # Passes 2..: incremental logistic regression
+    clf = SGDClassifier(loss="log_loss", alpha=1e-4, random_state=0)
+    classes = np.array(sorted(classes))
+    for epoch in range(EPOCHS):
+        for offset, df in _iter_chunks(path, CHUNK_ROWS):
+            tr = df[~_is_val(offset, df)]
+            if not tr.empty:
+                clf.partial_fit(pre.transform(tr[ALL_FEATURES]), tr["label"].astype(int), classes=classes)
+        print(f"[train] epoch {epoch + 1}/{EPOCHS} done")
+
+    model = Pipeline([("pre", pre), ("lr", clf)])
+
+    # Streamed hold-out evaluation
+    y_true, y_pred = [], []
+    for offset, df in _iter_chunks(path, CHUNK_ROWS):
+        va = df[_is_val(offset, df)]
+        if not va.empty:
+            y_true.append(va["label"].astype(int).to_numpy())
+            y_pred.append(model.predict(va[ALL_FEATURES]))
+    if y_true:
+        print(classification_report(np.concatenate(y_true), np.concatenate(y_pred), digits=3))
+    else:
+        print("[train] Validation split is empty; skipped evaluation.")
+
+    dt = time.perf_counter() - t0
+    mem = _peak_mem_mb()
+    rows_seen = n_rows * (EPOCHS + 2)
+    print(f"[train] {rows_seen} rows processed in {dt:.1f}s ({rows_seen / max(dt, 1e-9):,.0f} rows/s), "
+          f"peak RSS {'n/a' if mem is None else f'{mem:.0f} MB'}")
+    return model
+
 def main():
-    if not TRAIN_CSV.exists():
+    if not TRAIN_PATH.exists():
+        if TRAIN_PATH.resolve() != TRAIN_CSV.resolve():
+            raise SystemExit(f"[train] TRAIN_PATH {TRAIN_PATH} does not exist "
+                             f"(only the default {TRAIN_CSV} is built automatically)")
         # build from raster + points.csv or generated grid
         from build_dataset import build as build_ds
         build_ds()
 
-    df = pd.read_csv(TRAIN_CSV)
-    X = df[ALL_FEATURES].copy()
-    y = df["label"].astype(int)
+    if TRAIN_STREAM:
+        clf = train_streaming(TRAIN_PATH)
+    else:
+        df = pd.read_csv(TRAIN_PATH) if TRAIN_PATH.suffix.lower() == ".csv" else pd.read_parquet(TRAIN_PATH)
+        X = df[ALL_FEATURES].copy()
+        y = df["label"].astype(int)
 
-    pre = ColumnTransformer([
-        ("cat", OneHotEncoder(handle_unknown="ignore"), CAT_FEATURES),
-        ("num", "passthrough", NUM_FEATURES),
-    ])
-    clf = Pipeline([("pre", pre), ("lr", LogisticRegression(max_iter=300))]).fit(X, y)
+        pre = ColumnTransformer([
+            ("cat", OneHotEncoder(handle_unknown="ignore"), CAT_FEATURES),
+            ("num", "passthrough", NUM_FEATURES),
+        ])
+        clf = Pipeline([("pre", pre), ("lr", LogisticRegression(max_iter=300))]).fit(X, y)
 
-    yhat = clf.predict(X)
-    print(classification_report(y, yhat, digits=3))
+        yhat = clf.predict(X)
+        print(classification_report(y, yhat, digits=3))
 
     CACHE_DIR.mkdir(exist_ok=True, parents=True)
     joblib.dump(clf, MODEL_PATH)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# make the `app` package importable when running `pytest` from the repo root,
+# and the repo root itself for `src` / `scripts` (pyramid fixtures)
+_HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.abspath(os.path.join(_HERE, "..")))
+sys.path.append(os.path.abspath(os.path.join(_HERE, "..", "..")))
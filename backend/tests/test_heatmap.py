@@ -0,0 +1,40 @@
+import math
+
+import numpy as np
+import pytest
+
+from app import heatmap
+
+def _ring(lat: float, lon: float, dist_m: float, n: int = 24):
+    """n points dist_m (true ground metres) around (lat, lon)."""
+    ang = np.linspace(0, 2 * math.pi, n, endpoint=False)
+    return [{"lat": lat + dist_m * math.sin(a) / 110_540,
+             "lon": lon + dist_m * math.cos(a) / (111_320 * math.cos(math.radians(lat)))} for a in ang]
+
+def _count_at(grid, counts, lat, lon):
+    r, c = grid.to_pixel(np.array([lon]), np.array([lat]))
+    return counts[r[0] - grid.pad[0], c[0] - grid.pad[1]]
+
+@pytest.mark.parametrize("lat", [12.97, 28.6, 45.0])
+def test_competitor_disc_uses_ground_radius(lat):
+    lon, radius = 77.2, 800
+    bbox = (lon - 0.03, lat - 0.03, lon + 0.03, lat + 0.03)
+    grid = heatmap.grid_without_raster(bbox, radius)
+    inside = _ring(lat, lon, 0.8 * radius)
+    outside = _ring(lat, lon, 1.25 * radius)
+    _, counts = heatmap.compute_surfaces(grid, inside + outside)
+    assert _count_at(grid, counts, lat, lon) == len(inside)
+
+def test_competitor_disc_from_raster_grid(tmp_path):
+    rasterio = pytest.importorskip("rasterio")
+    from rasterio.transform import from_origin
+    lat, lon, radius = 28.6, 77.2, 800
+    fp = tmp_path / "pop.tif"
+    res = 0.0008
+    with rasterio.open(fp, "w", driver="GTiff", width=200, height=200, count=1, dtype="float32",
+                       crs="EPSG:4326", transform=from_origin(lon - 0.08, lat + 0.08, res, res)) as ds:
+        ds.write(np.ones((1, 200, 200), dtype="float32"))
+    grid = heatmap.grid_from_raster(str(fp), (lon - 0.02, lat - 0.02, lon + 0.02, lat + 0.02), radius)
+    mean, counts = heatmap.compute_surfaces(grid, _ring(lat, lon, 0.8 * radius) + _ring(lat, lon, 1.25 * radius))
+    assert _count_at(grid, counts, lat, lon) == 24
+    assert np.allclose(mean, 1.0)
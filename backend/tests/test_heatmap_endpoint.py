@@ -0,0 +1,35 @@
+import pytest
+import requests
+from fastapi.testclient import TestClient
+
+from app import main
+
+BBOX = "77.18,28.58,77.22,28.62"
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "POI_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("POP_TIF_PATH", raising=False)
+    return TestClient(main.app)
+
+def test_overpass_failure_is_reported(client, monkeypatch):
+    seen = {}
+    def fail(url, data, timeout):
+        seen["timeout"] = timeout
+        raise requests.exceptions.ReadTimeout("read timed out")
+    monkeypatch.setattr(main.requests, "post", fail)
+    r = client.get("/heatmap", params={"bbox": BBOX})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["debug"]["poi_count"] is None
+    assert "ReadTimeout" in body["debug"]["poi_error"] and "ReadTimeout" in r.headers["x-poi-error"]
+    assert set(body["competition"]) == {55}
+    # client waits at least as long as the server-side query timeout
+    assert seen["timeout"] >= main.OVERPASS_BBOX_TIMEOUT_S
+
+def test_radius_validation_and_grid_headers(client):
+    for bad in (0, -500, main.HEATMAP_MAX_RADIUS_M + 1):
+        assert client.get("/heatmap", params={"bbox": BBOX, "radius_m": bad, "consider_competition": False}).status_code == 422
+    r = client.get("/heatmap", params={"bbox": BBOX, "consider_competition": False})
+    assert r.headers["x-grid-shape"] == ",".join(map(str, r.json()["shape"]))
+    assert r.json()["debug"]["poi_error"] is None
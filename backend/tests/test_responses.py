@@ -0,0 +1,152 @@
+import gzip
+import json
+
+import msgpack
+import numpy as np
+import pyarrow as pa
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from starlette.responses import Response
+
+from app import responses
+from app.responses import (ARROW_MEDIA, MSGPACK_MEDIA, CompressionMiddleware, FastJSONResponse,
+                           columnar_response, wanted_columnar)
+
+MIN = 1024
+COLUMNS = {"lat": np.array([12.9, 13.0, 13.1]), "count": np.array([1, 2, 3], dtype=np.int64),
+           "name": ["a", "b", "a"], "open": [None, "08:00-22:00", None]}
+META = {"radius_m": 500, "note": "ünïcode"}
+
+def _app() -> FastAPI:
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=MIN)
+
+    @app.get("/json")
+    def json_body(n: int):
+        return FastJSONResponse({"xs": np.arange(n)})
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((b"x" * 4096 for _ in range(3)), media_type="text/plain")
+
+    @app.get("/image")
+    def image():
+        return Response(b"\x89PNG" + b"\0" * 5000, media_type="image/png")
+
+    @app.get("/rows")
+    def rows(request: Request):
+        return columnar_response(request, COLUMNS, META) or FastJSONResponse({"meta": META})
+
+    return app
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(_app())
+
+def _request(accept: str) -> Request:
+    return Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+
+# ---- Negotiation -------------------------------------------------------------
+
+@pytest.mark.parametrize("header, expected", [
+    ("", None),
+    ("gzip", "gzip"),
+    ("gzip, br", "br"),                      # tie: br preferred
+    ("br;q=0.1, gzip;q=1", "gzip"),
+    ("br;q=0, gzip;q=0.2", "gzip"),
+    ("*", "br"),
+    ("*;q=0.5, br;q=0", "gzip"),
+    ("deflate, identity", None),
+    ("gzip;q=0.4, identity;q=0.8", None),
+    ("gzip;q=0, *;q=0", None),
+    ("GZIP;Q=0.5", "gzip"),
+    ("gzip;q=oops, br;q=0.3", "br"),
+])
+def test_pick_encoding_follows_q(header, expected):
+    assert responses._pick_encoding(header) == expected
+
+def test_pick_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+    assert responses._pick_encoding("br;q=1, gzip;q=0.5") == "gzip"
+    assert responses._pick_encoding("br") is None
+
+@pytest.mark.parametrize("accept, expected", [
+    ("", None),
+    ("*/*", None),
+    (ARROW_MEDIA, ARROW_MEDIA),
+    ("application/msgpack", MSGPACK_MEDIA),
+    (f"application/json, {ARROW_MEDIA}", None),                   # tie: JSON
+    (f"{ARROW_MEDIA}, application/json", None),
+    (f"application/json;q=0.5, {ARROW_MEDIA}", ARROW_MEDIA),
+    (f"{ARROW_MEDIA};q=0.2, {MSGPACK_MEDIA};q=0.9, */*;q=0.1", MSGPACK_MEDIA),
+    (f"{ARROW_MEDIA};q=0.5, application/*;q=0.8", None),
+    (f"{ARROW_MEDIA};q=0.5, application/json;q=0.1, */*", ARROW_MEDIA),  # most specific JSON range
+    (f"{ARROW_MEDIA};q=0", None),
+])
+def test_wanted_columnar_follows_q(accept, expected):
+    assert wanted_columnar(_request(accept)) == expected
+
+# ---- Compression middleware --------------------------------------------------
+
+def test_small_body_is_not_compressed(client):
+    r = client.get("/json", params={"n": 3}, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+    assert int(r.headers["content-length"]) < MIN and r.json() == {"xs": [0, 1, 2]}
+
+@pytest.mark.parametrize("accept_encoding, expected", [("gzip", "gzip"), ("br;q=0.1, gzip", "gzip"),
+                                                       ("gzip;q=0.5, br", "br")])
+def test_large_body_is_compressed_with_vary(client, accept_encoding, expected):
+    r = client.get("/json", params={"n": 2000}, headers={"Accept-Encoding": accept_encoding})
+    assert r.headers["content-encoding"] == expected
+    assert "accept-encoding" in r.headers["vary"].lower()
+    assert int(r.headers["content-length"]) < len(r.content)  # httpx decoded the body
+    assert r.json()["xs"] == list(range(2000))
+
+def test_gzip_body_on_the_wire(client):
+    with client.stream("GET", "/json", params={"n": 2000}, headers={"Accept-Encoding": "gzip"}) as r:
+        raw = b"".join(r.iter_raw())
+    assert json.loads(gzip.decompress(raw))["xs"][-1] == 1999
+
+def test_no_accept_encoding_is_identity(client):
+    r = client.get("/json", params={"n": 2000}, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers and len(r.content) >= MIN
+
+def test_streaming_response_passes_through(client):
+    r = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+    assert r.content == b"x" * 4096 * 3
+
+def test_image_passes_through(client):
+    r = client.get("/image", headers={"Accept-Encoding": "gzip, br"})
+    assert "content-encoding" not in r.headers
+    assert r.content.startswith(b"\x89PNG") and len(r.content) == 5004
+
+# ---- Columnar round trips ----------------------------------------------------
+
+def test_arrow_round_trip(client):
+    r = client.get("/rows", headers={"Accept": ARROW_MEDIA})
+    assert r.headers["content-type"] == ARROW_MEDIA
+    table = pa.ipc.open_stream(r.content).read_all()
+    assert json.loads(table.schema.metadata[b"meta"]) == META
+    assert table.column("lat").to_pylist() == COLUMNS["lat"].tolist()
+    assert table.column("count").type == pa.int64()
+    assert pa.types.is_dictionary(table.column("name").type)
+    assert table.column("name").to_pylist() == COLUMNS["name"]
+    assert table.column("open").to_pylist() == COLUMNS["open"]
+
+def test_msgpack_round_trip(client):
+    r = client.get("/rows", headers={"Accept": f"application/json;q=0.5, {MSGPACK_MEDIA}"})
+    assert r.headers["content-type"] == MSGPACK_MEDIA
+    body = msgpack.unpackb(r.content, raw=False)
+    assert body["meta"] == META
+    for k in ("lat", "count"):
+        col = body["columns"][k]
+        arr = np.frombuffer(col["data"], dtype=col["dtype"]).reshape(col["shape"])
+        np.testing.assert_array_equal(arr, COLUMNS[k])
+    assert body["columns"]["name"] == COLUMNS["name"] and body["columns"]["open"] == COLUMNS["open"]
+
+def test_json_stays_default(client):
+    r = client.get("/rows", headers={"Accept": f"{ARROW_MEDIA};q=0.3, */*"})
+    assert r.headers["content-type"] == "application/json" and r.json() == {"meta": META}
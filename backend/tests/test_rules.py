@@ -0,0 +1,120 @@
+"""
+Parity of the vectorized rules (app/rules.py) and the /analyze helpers built on
+them with the original scalar rules, kept here verbatim as the reference.
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pytest
+
+from app import rules
+from app.main import BUSINESS_PROFILES, make_pros_cons, risk_from_inputs
+
+N = 2000
+
+# ---- Reference: scalar rules as originally written in main.py ----------------
+
+def _ref_risk(project_type: str, budget_lakh: float, seating: int,
+              hours_str: Optional[str], demand: int, competition: int) -> int:
+    prof = BUSINESS_PROFILES.get(rules.norm_project_key(project_type), BUSINESS_PROFILES["cafe"])
+    lo_b, hi_b = prof["typ_budget"]
+    lo_s, hi_s = prof["typ_seating"]
+
+    risk = 50
+    if budget_lakh < lo_b:
+        risk += 15
+    if budget_lakh > hi_b:
+        risk -= 10
+    if hi_s > 0:
+        if seating < lo_s:
+            risk += 10
+        if seating > hi_s:
+            risk += 5
+    try:
+        hspan = hours_str or "08:00-22:00"
+        start, end = hspan.split("-")
+        sh, eh = int(start.split(":")[0]), int(end.split(":")[0])
+        open_h = (eh - sh) % 24
+        if open_h >= 12:
+            risk += 8
+        if open_h >= 16:
+            risk += 5
+    except Exception:
+        pass
+    if demand <= 40:
+        risk += 10
+    if competition >= 70:
+        risk += 12
+    return max(0, min(100, risk))
+
+def _ref_pros_cons(project_type: str, demand: int, risk: int, competition: int,
+                   city: Optional[str], radius_m: int) -> Tuple[List[str], List[str]]:
+    pros: List[str] = []
+    cons: List[str] = []
+    if demand >= 65:
+        pros.append("Strong local demand near the chosen spot.")
+    if competition <= 35:
+        pros.append("Low saturation—clear headroom for growth.")
+    if risk <= 40:
+        pros.append("Operational risk appears manageable.")
+    if demand < 45:
+        cons.append("Weak customer base; consider moving closer to footfall.")
+    if competition > 70:
+        cons.append("Heavy competition within the catchment.")
+    if risk > 65:
+        cons.append("Operational risk (budget, hours, or seasonality) is elevated.")
+    p = rules.norm_project_key(project_type)
+    if "cafe" in p:
+        if competition > 60:
+            cons.append("Many cafés nearby—focus on niche (breakfast/late-night).")
+        else:
+            pros.append("Cafe format fits student/office crowd in this area.")
+    if "gym" in p:
+        if demand >= 60:
+            pros.append("Good fitness interest; group classes could work.")
+    if "stationery" in p:
+        pros.append("Proximity to campus/offices favors stationery/print demand.")
+    if "hostel_mess" in p:
+        if demand >= 55:
+            pros.append("Student density favors mess/meal plans.")
+    pros.append(f"Radius {radius_m} m analyzed{(' in ' + city) if city else ''}.")
+    return pros, cons
+
+# ---- Tests ----------------------------------------------------------------------
+
+HOURS_POOL = ["08:00-22:00", "06:00-23:00", "10:00-14:00", "22:00-06:00", "00:00-24:00",
+              "9-21", "bad", "", None, "08:00-12:00-16:00"]
+PROJECTS = list(BUSINESS_PROFILES) + ["Hostel Mess", "unknown shop"]
+
+@pytest.fixture(scope="module")
+def table():
+    return rules.compile_profiles(BUSINESS_PROFILES)
+
+def _inputs(seed: int):
+    rng = np.random.default_rng(seed)
+    return (rng.uniform(0, 150, N).round(1), rng.integers(0, 250, N),
+            rng.choice(np.array(HOURS_POOL, dtype=object), N),
+            rng.integers(0, 101, N), rng.integers(0, 101, N))
+
+@pytest.mark.parametrize("project", PROJECTS)
+def test_vector_rules_match_reference(table, project):
+    budget, seating, hours, demand, comp = _inputs(PROJECTS.index(project))
+    prof = rules.lookup_profile(table, project)
+    risk = rules.risk_vec(prof, budget, seating, [rules.parse_open_hours(h) for h in hours], demand, comp)
+    masks = rules.pros_cons_masks(project, demand, risk, comp)
+    for i in range(N):
+        args = (float(budget[i]), int(seating[i]), hours[i], int(demand[i]), int(comp[i]))
+        assert risk[i] == _ref_risk(project, *args), (i, args)
+        assert rules.pros_cons_at(masks, i, "Vellore", 500) == \
+            _ref_pros_cons(project, int(demand[i]), int(risk[i]), int(comp[i]), "Vellore", 500)
+
+@pytest.mark.parametrize("project", PROJECTS)
+def test_scalar_helpers_match_reference(project):
+    budget, seating, hours, demand, comp = _inputs(100 + PROJECTS.index(project))
+    for i in range(0, N, 10):
+        args = (float(budget[i]), int(seating[i]), hours[i], int(demand[i]), int(comp[i]))
+        risk = risk_from_inputs(project, *args)
+        assert risk == _ref_risk(project, *args) and isinstance(risk, int)
+        city = None if i % 20 else "Vellore"
+        assert make_pros_cons(project, int(demand[i]), risk, int(comp[i]), city, 800) == \
+            _ref_pros_cons(project, int(demand[i]), risk, int(comp[i]), city, 800)
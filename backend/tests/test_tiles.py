@@ -0,0 +1,106 @@
+import math
+import os
+
+import mapbox_vector_tile
+import numpy as np
+import pytest
+
+from app import tiles
+from scripts.build_tiles import AGG, _level_arrays
+from src.features.hexgrid import HexGrid
+from src.utils import h3compat
+
+PROPS = ["pop", "comp_density", "score", "count"]
+LAT, LON = 12.97, 77.59
+
+def _tile_xy(lat: float, lon: float, z: int):
+    n = 2 ** z
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return x, y
+
+@pytest.fixture(scope="module")
+def pyramid(tmp_path_factory):
+    """Same layout as scripts/build_tiles.py: res 9 cells and their res 7/8 parents."""
+    cells = h3compat.grid_disk(h3compat.latlng_to_cell(LAT, LON, 9), 6)
+    rng = np.random.default_rng(0)
+    fine = HexGrid(cells, {"pop": rng.uniform(0, 500, len(cells)),
+                           "comp_density": rng.integers(0, 5, len(cells)).astype(float),
+                           "score": rng.uniform(0, 1, len(cells))})
+    fine["count"] = np.ones(len(fine))
+    out = {}
+    for res in (7, 8, 9):
+        level = fine if res == 9 else fine.to_parent(res, AGG)
+        for k, v in _level_arrays(level).items():
+            out[f"cafe/{res}/{k}"] = v
+    path = tmp_path_factory.mktemp("tiles") / "pyramid.npz"
+    np.savez_compressed(path, **out)
+    return tiles.Pyramid(str(path))
+
+def _shoelace(ring):
+    xs, ys = np.array(ring, dtype=float).T
+    return float(np.dot(xs, np.roll(ys, -1)) - np.dot(np.roll(xs, -1), ys))
+
+@pytest.mark.parametrize("z", [11, 13, 15])
+def test_tile_round_trip(pyramid, z):
+    levels = pyramid.levels["cafe"]
+    level = levels[tiles.res_for_zoom(z, list(levels))]
+    x, y = _tile_xy(LAT, LON, z)
+    data = tiles.encode_tile(level, z, x, y, PROPS)
+    decoded = mapbox_vector_tile.decode(data, default_options={"y_coord_down": True})
+
+    assert list(decoded) == [tiles.LAYER]
+    layer = decoded[tiles.LAYER]
+    assert layer["extent"] == tiles.EXTENT and layer["features"]
+    by_h3 = {format(int(h), "x"): i for i, h in enumerate(level["ids"])}
+    for feat in layer["features"]:
+        i = by_h3[feat["properties"]["h3"]]
+        assert feat["id"] == i + 1
+        for k in PROPS:
+            assert feat["properties"][k] == pytest.approx(round(float(level[k][i]), 4))
+
+        geom = feat["geometry"]
+        assert geom["type"] == "Polygon" and len(geom["coordinates"]) == 1
+        ring = geom["coordinates"][0]
+        # exterior rings are clockwise with y down (positive shoelace area)
+        assert _shoelace(ring) > 0
+        # vertices sit on the projected cell boundary (within rounding)
+        lo, hi = level["offsets"][i], level["offsets"][i + 1]
+        px, py = tiles._to_tile_px(level["lon"][lo:hi], level["lat"][lo:hi], z, x, y)
+        expected = set(zip(px.tolist(), py.tolist()))
+        assert {tuple(p) for p in ring} <= expected
+
+def test_tile_outside_pyramid_is_empty(pyramid):
+    level = pyramid.levels["cafe"][8]
+    x, y = _tile_xy(-LAT, -LON, 13)
+    assert tiles.encode_tile(level, 13, x, y, PROPS) == b""
+
+# ---- DiskLRU -----------------------------------------------------------------
+
+def test_disk_lru_evicts_least_recently_used(tmp_path):
+    lru = tiles.DiskLRU(str(tmp_path), max_bytes=300)
+    for name in ("a", "b", "c"):
+        lru.put(f"z/{name}.mvt", name.encode() * 100)
+    assert lru.get("z/a.mvt") == b"a" * 100  # a is now the most recent
+    lru.put("z/d.mvt", b"d" * 100)            # over budget: b goes
+    assert lru.get("z/b.mvt") is None and not (tmp_path / "z" / "b.mvt").exists()
+    assert lru.get("z/a.mvt") is not None and lru.get("z/c.mvt") is not None
+    lru.put("z/c.mvt", b"C" * 50)             # overwrite counts only the new size
+    lru.put("z/e.mvt", b"e" * 100)            # 100 (a) + 50 + 100 + 100 > 300: d goes
+    assert lru.get("z/d.mvt") is None
+    assert sorted(os.listdir(tmp_path / "z")) == ["a.mvt", "c.mvt", "e.mvt"]
+
+def test_disk_lru_reloads_recency_from_disk(tmp_path):
+    lru = tiles.DiskLRU(str(tmp_path), max_bytes=300)
+    for t, name in enumerate(("a", "b", "c")):
+        lru.put(f"{name}.mvt", b"x" * 100)
+        os.utime(tmp_path / f"{name}.mvt", (1000 + t, 1000 + t))
+    assert lru.get("a.mvt") is not None  # touches mtime: a is newest across a restart
+    reopened = tiles.DiskLRU(str(tmp_path), max_bytes=300)
+    reopened.put("d.mvt", b"x" * 100)
+    assert sorted(os.listdir(tmp_path)) == ["a.mvt", "c.mvt", "d.mvt"]
+
+def test_disk_lru_keeps_single_oversized_entry(tmp_path):
+    lru = tiles.DiskLRU(str(tmp_path), max_bytes=10)
+    lru.put("big.mvt", b"x" * 100)
+    assert lru.get("big.mvt") == b"x" * 100
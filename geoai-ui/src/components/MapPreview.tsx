@@ -1,7 +1,8 @@
 "use client";
 
-import { MapContainer, TileLayer, Marker, Circle } from "react-leaflet";
+import { MapContainer, TileLayer, Marker, Circle, ImageOverlay } from "react-leaflet";
 import L from "leaflet";
+import type { HeatmapBounds } from "@/lib/api";
 
 // Fix default marker icons when bundling
 delete (L.Icon.Default.prototype as any)._getIconUrl;
@@ -17,11 +18,13 @@ export default function MapPreview({
   lon,
   radiusM = 500,
   height = 320,
+  heatmap,
 }: {
   lat: number;
   lon: number;
   radiusM?: number;
   height?: number;
+  heatmap?: { url: string; bounds: HeatmapBounds };
 }) {
   // Must have height, or you’ll see nothing
   return (
@@ -36,6 +39,9 @@ export default function MapPreview({
           attribution="&copy; OpenStreetMap contributors"
           url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png"
         />
+        {heatmap && (
+          <ImageOverlay url={heatmap.url} bounds={heatmap.bounds} opacity={0.55} />
+        )}
         <Marker position={[lat, lon]} />
         <Circle center={[lat, lon]} radius={radiusM} />
       </MapContainer>
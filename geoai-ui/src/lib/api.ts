@@ -11,6 +11,13 @@ export type FeasibilityResponse = {
   pros: string[];
   cons: string[];
   scores: { risk: number; demand: number; competition: number };
+  // present when the request sends `radii: number[]`
+  sweep?: {
+    radius_m: number;
+    scores: { risk: number; demand: number; competition: number };
+    poi_count: number;
+    mean_density: number | null;
+  }[];
 };
 
 export async function analyze(payload: any) {
@@ -42,3 +49,22 @@ export async function predict(payload: any) {
   if (!res.ok) throw new Error(`Predict failed: ${res.status}`);
   return (await res.json()) as PredictionResponse;
 }
+
+export type HeatmapBounds = [[number, number], [number, number]]; // [[south, west], [north, east]]
+
+// PNG overlay from GET /heatmap: R = demand, G = competition
+export function heatmapUrl(p: {
+  bounds: HeatmapBounds;
+  radiusM: number;
+  projectType: string;
+}) {
+  const base = process.env.NEXT_PUBLIC_API_BASE || "http://localhost:8000";
+  const [[south, west], [north, east]] = p.bounds;
+  const q = new URLSearchParams({
+    bbox: [west, south, east, north].join(","),
+    radius_m: String(p.radiusM),
+    project_type: p.projectType,
+    format: "png",
+  });
+  return `${base}/heatmap?${q}`;
+}
@@ -1,9 +1,10 @@
 import os
 import yaml
-import pandas as pd
+import numpy as np
 import geopandas as gpd
 from src.utils.geo import get_city_polygon
-from src.features.tiling import polygon_to_h3
+from src.features.hexgrid import HexGrid, write_geojson
+from src.features.tiling import polygon_to_hexgrid
 from src.features.population import sum_population_per_hex
 from src.features.competition import comp_density
 from src.scoring.mvp_score import score_hex
@@ -12,17 +13,26 @@ CITY = os.environ.get("CITY", "Bengaluru, India")
 RES = int(os.environ.get("H3_RES", "8"))
 POP_TIF = os.environ.get("POP_TIF", "data/raw/population.tif")
 
+def category_features(hexes: HexGrid, pois: gpd.GeoDataFrame, categories):
+    # one category at a time; geometry is only generated as features are written
+    for cat in categories:
+        comp = comp_density(pois, hexes, category=cat, res=RES)
+        s = score_hex(hexes["pop"], comp)
+        grid = hexes.copy()
+        grid["comp_density"] = comp.to_numpy()
+        grid["score"] = s.to_numpy()
+        yield from grid.features({"category": cat}, ["pop", "comp_density", "score"])
+
 if __name__ == "__main__":
     polygon = get_city_polygon(CITY)
-    hexes = polygon_to_h3(polygon.iloc[0], RES)
-    hexes.to_file("data/interim/hexes.geojson", driver="GeoJSON")
+    hexes = polygon_to_hexgrid(polygon.iloc[0], RES)
 
     # population
     if os.path.exists(POP_TIF):
         hexes = sum_population_per_hex(hexes, POP_TIF)
     else:
         # Fallback: uniform pop so you can proceed; replace once you add a raster
-        hexes["pop"] = 1.0
+        hexes["pop"] = np.ones(len(hexes))
 
     # read POIs from previous step
     pois = gpd.read_file("data/interim/pois.geojson")
@@ -31,17 +41,10 @@ if __name__ == "__main__":
     with open("config/categories.yaml", "r", encoding="utf-8") as f:
         cfg = yaml.safe_load(f)
 
-    out_frames = []
-    for cat in cfg["categories"].keys():
-        comp = comp_density(pois, hexes, category=cat, res=RES)
-        s = score_hex(hexes["pop"], comp)
-        out = hexes.copy()
-        out["category"] = cat
-        out["comp_density"] = comp.values
-        out["score"] = s.values
-        out_frames.append(out[["h3", "category", "pop", "comp_density", "score", "geometry"]])
-
-    full = pd.concat(out_frames).pipe(gpd.GeoDataFrame, geometry="geometry", crs="EPSG:4326")
+    # export: boundaries are streamed per feature, never held for the whole grid
+    os.makedirs("data/interim", exist_ok=True)
+    write_geojson("data/interim/hexes.geojson", hexes.features(columns=[]))
     os.makedirs("data/processed", exist_ok=True)
-    full.to_file("data/processed/opportunity.geojson", driver="GeoJSON")
+    write_geojson("data/processed/opportunity.geojson",
+                  category_features(hexes, pois, cfg["categories"].keys()))
     print("✅ Built dataset → data/processed/opportunity.geojson")
@@ -0,0 +1,9 @@
+import os
+from src.utils.gazetteer import build_gazetteer, GAZETTEER_DIR
+
+# Comma-separated dirs / globs of OSM JSON dumps (Nominatim, Overpass, GeoJSON extracts)
+SOURCES = os.environ.get("GAZETTEER_SOURCES", "cache,backend/cache/pois").split(",")
+
+if __name__ == "__main__":
+    n_bounds, n_entries = build_gazetteer([s.strip() for s in SOURCES if s.strip()], GAZETTEER_DIR)
+    print(f"✅ Gazetteer: {n_bounds} boundary keys, {n_entries} entries → {GAZETTEER_DIR}")
@@ -0,0 +1,45 @@
+import os
+import numpy as np
+import geopandas as gpd
+from src.features.hexgrid import HexGrid
+from src.utils import h3compat
+
+SRC = os.environ.get("OPPORTUNITY_PATH", "data/processed/opportunity.geojson")
+OUT = os.environ.get("TILE_PYRAMID_PATH", "data/processed/opportunity_pyramid.npz")
+MIN_RES = int(os.environ.get("TILE_MIN_RES", "5"))
+
+# fine cells: population / competition summed into parents, score averaged
+AGG = {"pop": "sum", "comp_density": "sum", "score": "mean"}
+
+def _level_arrays(grid: HexGrid) -> dict:
+    """Columns plus boundaries as CSR (offsets into flat lon/lat) and per-cell bboxes."""
+    rings = [h3compat.cell_boundary(h)[:-1] for h in grid.ids]  # drop closing vertex
+    offsets = np.zeros(len(rings) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(r) for r in rings])
+    flat = np.array([p for r in rings for p in r], dtype=np.float64).reshape(-1, 2)
+    lon, lat = flat[:, 0], flat[:, 1]
+    starts = offsets[:-1]
+    return {
+        "ids": grid.ids,
+        "offsets": offsets,
+        "lon": lon, "lat": lat,
+        "minlon": np.minimum.reduceat(lon, starts), "maxlon": np.maximum.reduceat(lon, starts),
+        "minlat": np.minimum.reduceat(lat, starts), "maxlat": np.maximum.reduceat(lat, starts),
+        **{k: grid[k] for k in list(AGG) + ["count"]},
+    }
+
+if __name__ == "__main__":
+    gdf = gpd.read_file(SRC)
+    out = {}
+    for cat, part in gdf.groupby("category"):
+        fine = HexGrid.from_geodataframe(part, list(AGG))
+        fine["count"] = np.ones(len(fine))
+        fine_res = int(fine.resolutions[0])
+        for res in range(MIN_RES, fine_res + 1):
+            level = fine if res == fine_res else fine.to_parent(res, AGG)
+            for k, v in _level_arrays(level).items():
+                out[f"{cat}/{res}/{k}"] = v
+            print(f"[tiles] {cat} res {res}: {len(level)} cells")
+    os.makedirs(os.path.dirname(OUT), exist_ok=True)
+    np.savez_compressed(OUT, **out)
+    print(f"✅ Tile pyramid → {OUT}")
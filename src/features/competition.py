@@ -2,28 +2,33 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 import geopandas as gpd
-import h3
 
-def comp_density(points_gdf: gpd.GeoDataFrame, hex_gdf: gpd.GeoDataFrame, category: str, res: int = 8) -> pd.Series:
-    pts = points_gdf[points_gdf["category"] == category].copy()
-    if pts.empty:
-        return pd.Series(0.0, index=hex_gdf.index)
+from src.features.hexgrid import HexGrid
+from src.features.tiling import points_to_cells
+from src.utils import h3compat
+
+def comp_density(points_gdf: gpd.GeoDataFrame, hex_gdf: gpd.GeoDataFrame | HexGrid, category: str, res: int = 8) -> pd.Series:
+    if isinstance(hex_gdf, HexGrid):
+        return _comp_density_grid(points_gdf, hex_gdf, category, res)
 
-    pts["h3"] = pts.geometry.apply(lambda p: h3.geo_to_h3(p.y, p.x, res))
-    counts = pts.groupby("h3").size()
+    # string-id frames share the array implementation; results come back in frame order
+    ids = np.fromiter((h3compat.str_to_int(h) for h in hex_gdf["h3"]), dtype=np.uint64, count=len(hex_gdf))
+    grid = HexGrid(ids)
+    smoothed = _comp_density_grid(points_gdf, grid, category, res).to_numpy()
+    return pd.Series(smoothed[grid.positions(ids)], index=hex_gdf.index)
 
-    base = hex_gdf.set_index("h3").index.to_series().map(counts).fillna(0.0)
+def _comp_density_grid(points_gdf: gpd.GeoDataFrame, grid: HexGrid, category: str, res: int) -> pd.Series:
+    pts = points_gdf[points_gdf["category"] == category]
+    if pts.empty:
+        return pd.Series(np.zeros(len(grid)))
+
+    pos = grid.positions(points_to_cells(pts, res))
+    base = np.bincount(pos[pos >= 0], minlength=len(grid)).astype(np.float64)
 
     # simple smoothing via neighbors (k-ring) with decay
     smoothed = base.copy()
-    for h in base.index:
-        val = base.loc[h]
-        acc = val
+    for i, h in enumerate(grid.ids):
         for k in (1, 2):  # look 1 and 2 rings out
-            nbrs = h3.k_ring(h, k) - {h}
-            decay = np.exp(-k)
-            acc += decay * base.reindex(nbrs).fillna(0.0).sum()
-        smoothed.loc[h] = acc
-
-    smoothed.index = hex_gdf.index  # align to hex_gdf ordering
-    return smoothed
+            nbrs = grid.positions(h3compat.grid_disk(h, k))
+            smoothed[i] += np.exp(-k) * (base[nbrs[nbrs >= 0]].sum() - base[i])
+    return pd.Series(smoothed)
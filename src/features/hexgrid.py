@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from shapely.geometry import Polygon
+
+from src.utils import h3compat
+
+
+@dataclass
+class HexGrid:
+    """
+    Compact H3 grid: cell ids as a sorted uint64 array plus float64 columns.
+    Boundary geometry is only generated when exporting (`features` / `to_geodataframe`).
+    """
+    ids: np.ndarray
+    columns: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __post_init__(self):
+        ids = np.asarray(self.ids, dtype=np.uint64)
+        order = np.argsort(ids, kind="stable")
+        self.ids = ids[order]
+        self.columns = {k: np.asarray(v, dtype=np.float64)[order] for k, v in self.columns.items()}
+
+    @classmethod
+    def from_polygon(cls, polygon, res: int = 8) -> "HexGrid":
+        return cls(np.unique(h3compat.cells_in_geojson(polygon.__geo_interface__, res)))
+
+    @classmethod
+    def from_geodataframe(cls, gdf: gpd.GeoDataFrame, columns: Optional[list] = None) -> "HexGrid":
+        ids = np.fromiter((h3compat.str_to_int(h) for h in gdf["h3"]), dtype=np.uint64, count=len(gdf))
+        return cls(ids, {c: gdf[c].to_numpy() for c in (columns or [])})
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __setitem__(self, name: str, values) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape != self.ids.shape:
+            raise ValueError(f"column '{name}' has {values.size} values for {len(self)} cells")
+        self.columns[name] = values
+
+    def copy(self) -> "HexGrid":
+        return HexGrid(self.ids.copy(), {k: v.copy() for k, v in self.columns.items()})
+
+    @property
+    def resolutions(self) -> np.ndarray:
+        return h3compat.get_resolutions(self.ids)
+
+    def h3_strings(self) -> np.ndarray:
+        return np.array([h3compat.int_to_str(h) for h in self.ids], dtype=object)
+
+    def positions(self, cells) -> np.ndarray:
+        """Row position of each cell id in this grid, -1 where absent."""
+        cells = np.asarray(cells, dtype=np.uint64)
+        pos = np.searchsorted(self.ids, cells)
+        pos = np.minimum(pos, max(len(self) - 1, 0))
+        hit = (self.ids[pos] == cells) if len(self) else np.zeros(cells.shape, dtype=bool)
+        return np.where(hit, pos, -1)
+
+    def geo_interfaces(self) -> Iterator[dict]:
+        """GeoJSON-like polygon dicts, one cell at a time (no shapely objects kept)."""
+        for h in self.ids:
+            yield {"type": "Polygon", "coordinates": [h3compat.cell_boundary(h)]}
+
+    def features(self, properties: Optional[dict] = None, columns: Optional[List[str]] = None) -> Iterator[dict]:
+        """
+        GeoJSON Features: {"h3", **properties, **columns} per cell (all columns by default).
+        Boundaries are generated one cell at a time, like geo_interfaces().
+        """
+        names = list(self.columns) if columns is None else columns
+        for i, geom in enumerate(self.geo_interfaces()):
+            props = {"h3": h3compat.int_to_str(self.ids[i]), **(properties or {})}
+            for k in names:
+                v = float(self.columns[k][i])
+                props[k] = v if math.isfinite(v) else None
+            yield {"type": "Feature", "properties": props, "geometry": geom}
+
+    def to_geodataframe(self) -> gpd.GeoDataFrame:
+        geoms = [Polygon(g["coordinates"][0]) for g in self.geo_interfaces()]
+        data = {"h3": self.h3_strings(), **self.columns}
+        return gpd.GeoDataFrame(data, geometry=geoms, crs="EPSG:4326")
+
+    def to_parent(self, res: int, how: Optional[Dict[str, str]] = None) -> "HexGrid":
+        """
+        Aggregate to the parent cells at a coarser resolution.
+        Columns use `how` (default "sum"); a "count" column tracks the number of finest cells.
+        """
+        parents = h3compat.cells_to_parent(self.ids, res)
+        frame = pd.DataFrame(self.columns)
+        if "count" not in frame:
+            frame["count"] = 1.0
+        how = {k: (how or {}).get(k, "sum") for k in frame.columns}
+        agg = frame.groupby(parents).agg(how)
+        return HexGrid(agg.index.to_numpy(dtype=np.uint64), {k: agg[k].to_numpy() for k in agg.columns})
+
+    def compact(self, how: Optional[Dict[str, str]] = None) -> "HexGrid":
+        """
+        Merge complete sibling sets into their parents (mixed resolutions).
+        Columns are aggregated with `how` (default "sum"; e.g. {"score": "mean"}).
+        """
+        res = self.resolutions
+        if len(self) and (res != res[0]).any():
+            raise ValueError("compact() expects a single-resolution grid")
+        compacted = np.asarray(h3compat.compact_cells(self.ids), dtype=np.uint64)
+        if compacted.size == len(self):
+            return self.copy()
+
+        owner = self.ids.copy()
+        c_res = h3compat.get_resolutions(compacted)
+        for r in np.unique(c_res):
+            if len(self) and r == res[0]:
+                continue
+            parents = h3compat.cells_to_parent(self.ids, int(r))
+            hit = np.isin(parents, compacted[c_res == r])
+            owner[hit] = parents[hit]
+
+        if not self.columns:
+            return HexGrid(compacted)
+        how = {k: (how or {}).get(k, "sum") for k in self.columns}
+        agg = pd.DataFrame(self.columns).groupby(owner).agg(how)
+        return HexGrid(agg.index.to_numpy(dtype=np.uint64), {k: agg[k].to_numpy() for k in agg.columns})
+
+
+def write_geojson(path: str, features: Iterable[dict]) -> int:
+    """Stream Features into a FeatureCollection file; returns the number written."""
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"type": "FeatureCollection", "features": [\n')
+        for feat in features:
+            f.write(",\n" if n else "")
+            json.dump(feat, f)
+            n += 1
+        f.write("\n]}\n")
+    return n
@@ -4,17 +4,23 @@ import numpy as np
 import geopandas as gpd
 from rasterio.mask import mask
 
-def sum_population_per_hex(hex_gdf: gpd.GeoDataFrame, pop_tif_path: str) -> gpd.GeoDataFrame:
+from src.features.hexgrid import HexGrid
+
+def _masked_sum(src, geom: dict) -> float:
+    try:
+        out_img, _ = mask(src, [geom], crop=True)
+        return float(np.nansum(out_img))
+    except Exception:
+        return 0.0
+
+def sum_population_per_hex(hex_gdf: gpd.GeoDataFrame | HexGrid, pop_tif_path: str) -> gpd.GeoDataFrame | HexGrid:
     hex_gdf = hex_gdf.copy()
-    results = []
     with rasterio.open(pop_tif_path) as src:
-        for _, row in hex_gdf.iterrows():
-            geom = [row.geometry.__geo_interface__]
-            try:
-                out_img, _ = mask(src, geom, crop=True)
-                pop_sum = float(np.nansum(out_img))
-            except Exception:
-                pop_sum = 0.0
-            results.append(pop_sum)
+        if isinstance(hex_gdf, HexGrid):
+            # boundaries are generated per cell and dropped right after masking
+            hex_gdf["pop"] = np.fromiter((_masked_sum(src, g) for g in hex_gdf.geo_interfaces()),
+                                         dtype=np.float64, count=len(hex_gdf))
+            return hex_gdf
+        results = [_masked_sum(src, row.geometry.__geo_interface__) for _, row in hex_gdf.iterrows()]
     hex_gdf["pop"] = results
     return hex_gdf
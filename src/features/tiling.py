@@ -1,40 +1,54 @@
 from __future__ import annotations
 
+from typing import Dict, Sequence
+
+import numpy as np
 import geopandas as gpd
 from shapely.geometry import Polygon
 
-# --- Robust H3 import (supports both "import h3" and "from h3 import h3 as h3core") ---
-try:
-    import h3  # modern package exposes functions at top-level
-    _polyfill = getattr(h3, "polyfill", None)
-    _to_boundary = getattr(h3, "h3_to_geo_boundary", None)
-    if _polyfill is None or _to_boundary is None:
-        raise ImportError("Top-level h3 API missing; try submodule import.")
-except Exception:
-    # Fallback to older submodule API: from h3 import h3 as h3core
-    from h3 import h3 as h3core  # type: ignore
-    _polyfill = h3core.polyfill
-    _to_boundary = h3core.h3_to_geo_boundary
+from src.features.hexgrid import HexGrid
+from src.utils import h3compat
 
 def polygon_to_h3(polygon, res: int = 8) -> gpd.GeoDataFrame:
-    geojson = polygon.__geo_interface__
-    hex_ids = list(_polyfill(geojson, res))
-    geoms = [Polygon(_to_boundary(h, geo_json=True)) for h in hex_ids]
+    ids = h3compat.cells_in_geojson(polygon.__geo_interface__, res)
+    hex_ids = [h3compat.int_to_str(h) for h in ids]
+    geoms = [Polygon(h3compat.cell_boundary(h)) for h in ids]
     return gpd.GeoDataFrame({"h3": hex_ids}, geometry=geoms, crs="EPSG:4326")
 
 
-def assign_points_to_h3(points_gdf: gpd.GeoDataFrame, res: int = 8) -> gpd.GeoDataFrame:
-    # Works for both API styles because geo_to_h3 exists in each
-    try:
-        import h3
-        geo_to_h3 = getattr(h3, "geo_to_h3", None)
-        if geo_to_h3 is None:
-            from h3 import h3 as h3core
-            geo_to_h3 = h3core.geo_to_h3
-    except Exception:
-        from h3 import h3 as h3core
-        geo_to_h3 = h3core.geo_to_h3
+def polygon_to_hexgrid(polygon, res: int = 8) -> HexGrid:
+    # uint64 ids only; use .features() / .to_geodataframe() when geometry is needed
+    return HexGrid.from_polygon(polygon, res)
+
+
+def points_to_cells(points_gdf: gpd.GeoDataFrame, res: int | Sequence[int] = 8) -> np.ndarray | Dict[int, np.ndarray]:
+    """
+    uint64 H3 cells for point geometries, indexed in bulk.
+    Pass a list of resolutions to get {res: cells} from a single indexing pass: the
+    finest resolution is the cell containing each point, the coarser ones are that
+    cell's H3 parents (nested, for aggregation), which for points near a cell edge
+    can differ from indexing directly at the coarse resolution.
+    """
+    lat, lng = points_gdf.geometry.y.to_numpy(), points_gdf.geometry.x.to_numpy()
+    if isinstance(res, int):
+        return h3compat.latlng_to_cells(lat, lng, res)
+    return h3compat.latlng_to_cells_multi(lat, lng, res)
+
 
+def assign_points_to_h3(points_gdf: gpd.GeoDataFrame, res: int | Sequence[int] = 8) -> gpd.GeoDataFrame:
+    """
+    One resolution → "h3" column (the cell containing each point).
+    Several → "h3_<finest>" with the containing cell plus "h3_parent_<r>" for each
+    coarser r: parents of the finest cell (see points_to_cells), not a direct
+    re-index, so grouping by them nests exactly. Call once per resolution when the
+    containing cell at every resolution is needed instead.
+    """
     out = points_gdf.copy()
-    out["h3"] = out.geometry.apply(lambda p: geo_to_h3(p.y, p.x, res))
+    cells = points_to_cells(out, res)
+    if isinstance(res, int):
+        out["h3"] = [h3compat.int_to_str(h) for h in cells]
+    else:
+        finest = max(cells)
+        for r, ids in cells.items():
+            out[f"h3_{r}" if r == finest else f"h3_parent_{r}"] = [h3compat.int_to_str(h) for h in ids]
     return out
@@ -2,6 +2,9 @@ from __future__ import annotations
 import pandas as pd
 
 def compute_gap(pop: pd.Series, comp: pd.Series, alpha: float | None = None) -> pd.Series:
+    # Accept plain arrays too (e.g. HexGrid columns)
+    pop = pop if isinstance(pop, pd.Series) else pd.Series(pop)
+    comp = comp if isinstance(comp, pd.Series) else pd.Series(comp)
     # Fit alpha so total predicted ~ total observed
     if alpha is None:
         alpha = (comp.sum() / (pop.sum() + 1e-9)) if pop.sum() > 0 else 0.0
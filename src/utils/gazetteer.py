@@ -0,0 +1,308 @@
+"""
+Offline gazetteer: city boundaries + an address / locality / POI-name index.
+
+Built once from OSM data already on disk (osmnx's `cache/` of Nominatim and
+Overpass responses, `backend/cache/pois`, or GeoJSON exported from an OSM
+extract), then queried in-process without any network calls.
+
+    data/gazetteer/boundaries.json   {key: {name, display_name, bbox, center, geometry}}
+    data/gazetteer/entries.json      parallel arrays sorted by normalized key
+"""
+from __future__ import annotations
+
+import bisect
+import difflib
+import glob
+import json
+import os
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+GAZETTEER_DIR = os.environ.get("GAZETTEER_DIR", "data/gazetteer")
+SIMPLIFY_TOL = 0.0005  # degrees (~50 m); boundaries only need to be good enough for polyfill
+MAX_CANDIDATES = 100   # fuzzy-scored entries per query
+MIN_SCORE = 0.75       # below this a query resolves to nothing rather than a weak hit
+TOKEN_MATCH = 0.8      # per-token similarity that counts as the same word (typos, centre/center)
+
+_PUNCT = re.compile(r"[^\w\s]+", re.UNICODE)
+
+def normalize(text: str) -> str:
+    return " ".join(_PUNCT.sub(" ", (text or "").lower()).split())
+
+def _covered(tokens: List[str], other: List[str]) -> float:
+    """Share of `tokens` that appear in `other` (exactly, or as a close spelling)."""
+    if not tokens:
+        return 0.0
+    hit = 0
+    for t in tokens:
+        if t in other or (not t.isdigit() and any(_close(t, o) for o in other)):
+            hit += 1
+    return hit / len(tokens)
+
+@lru_cache(maxsize=65536)
+def _close(a: str, b: str) -> bool:
+    # numbers must match exactly (100 vs 80 feet road); length bound skips most pairs
+    if b.isdigit() or 2 * min(len(a), len(b)) < TOKEN_MATCH * (len(a) + len(b)):
+        return False
+    sm = difflib.SequenceMatcher(None, a, b)
+    return sm.quick_ratio() >= TOKEN_MATCH and sm.ratio() >= TOKEN_MATCH
+
+def match_score(q: str, key: str, floor: float = 0.0, _sm: Optional[difflib.SequenceMatcher] = None) -> float:
+    """
+    Similarity of two normalized strings in [0, 1]: character ratio blended with token
+    coverage (share of the entry's words found in the query, and vice versa), so
+    extra words in the query cost little but a different street name costs a lot, and
+    disjoint numbers (street/house numbers) rule the entry out.
+    When even a perfect character ratio can't reach `floor`, that (costly) ratio is skipped.
+    `_sm` may be a SequenceMatcher with seq2 already set to q (reused across keys).
+    """
+    if key == q:
+        return 1.0
+    q_t, k_t = q.split(), key.split()
+    q_num, k_num = {t for t in q_t if t.isdigit()}, {t for t in k_t if t.isdigit()}
+    if q_num and k_num and q_num.isdisjoint(k_num):
+        return 0.0  # 120 vs 100 feet road: a different place, however close the rest
+    score = 0.45 * _covered(k_t, q_t) + 0.2 * _covered(q_t, k_t)
+    prefix = key.startswith(q) and len(q) >= 4
+    if prefix or score + 0.35 >= floor:
+        sm = _sm or difflib.SequenceMatcher(None, "", q)
+        sm.set_seq1(key)
+        score += 0.35 * sm.ratio()
+    if prefix:
+        score = max(score, 0.9)  # typed-ahead prefix
+    return score
+
+
+# ---- Build -------------------------------------------------------------------
+
+def _iter_json(paths: Iterable[str]):
+    for pattern in paths:
+        for fp in sorted(glob.glob(os.path.join(pattern, "*.json")) if os.path.isdir(pattern) else glob.glob(pattern)):
+            try:
+                with open(fp, "r", encoding="utf-8") as f:
+                    yield json.load(f)
+            except Exception:
+                continue
+
+def _boundary_record(name: str, display_name: str, geom: dict, center: Tuple[float, float]) -> dict:
+    from shapely.geometry import shape, mapping
+    g = shape(geom).simplify(SIMPLIFY_TOL, preserve_topology=True)
+    minx, miny, maxx, maxy = g.bounds
+    return {"name": name, "display_name": display_name, "bbox": [minx, miny, maxx, maxy],
+            "center": [center[0], center[1]], "geometry": mapping(g)}
+
+def build_gazetteer(sources: Iterable[str] = ("cache", "backend/cache/pois"), out_dir: str = GAZETTEER_DIR) -> Tuple[int, int]:
+    """
+    Scan JSON dumps and write the boundary store and the entry index.
+    Understands Nominatim result lists (with `geojson`), Overpass `elements`,
+    the backend POI cache lists, and GeoJSON FeatureCollections.
+    Returns (n_boundaries, n_entries).
+    """
+    boundaries: Dict[str, dict] = {}
+    entries: Dict[Tuple[str, str], Tuple[str, str, float, float, str]] = {}
+    streets: Dict[Tuple[str, str], List[Tuple[float, float]]] = defaultdict(list)
+
+    def add(name: str, kind: str, lat: float, lon: float, city: str = ""):
+        key = normalize(name)
+        if key and (key, kind) not in entries:
+            entries[(key, kind)] = (name, kind, float(lat), float(lon), normalize(city))
+
+    for data in _iter_json(sources):
+        # Nominatim (osmnx geocode_to_gdf responses)
+        if isinstance(data, list) and data and isinstance(data[0], dict) and "geojson" in data[0]:
+            for r in data:
+                geom = r.get("geojson") or {}
+                if geom.get("type") not in ("Polygon", "MultiPolygon"):
+                    continue
+                rec = _boundary_record(r.get("name", ""), r.get("display_name", ""), geom,
+                                       (float(r["lat"]), float(r["lon"])))
+                for alias in {normalize(r.get("name", "")), normalize(r.get("display_name", ""))} - {""}:
+                    boundaries.setdefault(alias, rec)
+                add(r.get("name", ""), "city", r["lat"], r["lon"])
+            continue
+
+        # backend/cache/pois: [{"lat", "lon", "name", "type"}]
+        if isinstance(data, list):
+            for p in data:
+                if isinstance(p, dict) and p.get("name") and "lat" in p and "lon" in p:
+                    add(p["name"], "poi", p["lat"], p["lon"])
+            continue
+
+        if not isinstance(data, dict):
+            continue
+
+        # GeoJSON from an OSM extract (e.g. osmium export): boundaries + named points
+        if data.get("type") == "FeatureCollection":
+            for feat in data.get("features", []):
+                props, geom = feat.get("properties") or {}, feat.get("geometry") or {}
+                name = props.get("name")
+                if not name:
+                    continue
+                if geom.get("type") in ("Polygon", "MultiPolygon") and props.get("boundary") == "administrative":
+                    from shapely.geometry import shape
+                    c = shape(geom).representative_point()
+                    boundaries.setdefault(normalize(name), _boundary_record(name, name, geom, (c.y, c.x)))
+                elif geom.get("type") == "Point":
+                    lon, lat = geom["coordinates"][:2]
+                    add(name, "locality" if props.get("place") else "poi", lat, lon, props.get("addr:city", ""))
+            continue
+
+        # Overpass: named POIs, place nodes and addr:* tags
+        for el in data.get("elements", []):
+            tags = el.get("tags") or {}
+            lat = el.get("lat") or (el.get("center") or {}).get("lat")
+            lon = el.get("lon") or (el.get("center") or {}).get("lon")
+            if lat is None or lon is None:
+                continue
+            city = tags.get("addr:city", "")
+            if tags.get("name"):
+                add(tags["name"], "locality" if tags.get("place") else "poi", lat, lon, city)
+            street = tags.get("addr:street")
+            if street:
+                streets[(street, city)].append((float(lat), float(lon)))
+                if tags.get("addr:housenumber"):
+                    add(f"{tags['addr:housenumber']} {street}", "address", lat, lon, city)
+
+    # streets: centroid of the addresses seen on them
+    for (street, city), pts in streets.items():
+        add(street, "street", sum(p[0] for p in pts) / len(pts), sum(p[1] for p in pts) / len(pts), city)
+
+    rows = sorted(entries.items())
+    index = {
+        "keys": [k for (k, _), _ in rows],
+        "names": [v[0] for _, v in rows],
+        "kinds": [v[1] for _, v in rows],
+        "lat": [round(v[2], 7) for _, v in rows],
+        "lon": [round(v[3], 7) for _, v in rows],
+        "city": [v[4] for _, v in rows],
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "boundaries.json"), "w", encoding="utf-8") as f:
+        json.dump(boundaries, f)
+    with open(os.path.join(out_dir, "entries.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    load_gazetteer.cache_clear()
+    return len(boundaries), len(rows)
+
+
+# ---- Lookup ------------------------------------------------------------------
+
+# prefer the more specific match when scores tie
+_KIND_RANK = {"address": 0, "poi": 1, "street": 2, "locality": 3, "city": 4}
+
+class Gazetteer:
+    def __init__(self, boundaries: Dict[str, dict], index: Dict[str, list]):
+        self.boundaries = boundaries
+        self.keys: List[str] = index["keys"]
+        self.names: List[str] = index["names"]
+        self.kinds: List[str] = index["kinds"]
+        self.lat: List[float] = index["lat"]
+        self.lon: List[float] = index["lon"]
+        self.city: List[str] = index["city"]
+        tokens: Dict[str, List[int]] = defaultdict(list)
+        for i, k in enumerate(self.keys):
+            for t in set(k.split()):
+                tokens[t].append(i)
+        self._token_list = sorted(tokens)
+        self._tokens = tokens
+
+    def _prefix_range(self, sorted_list: List[str], prefix: str) -> Tuple[int, int]:
+        lo = bisect.bisect_left(sorted_list, prefix)
+        hi = bisect.bisect_left(sorted_list, prefix + "\uffff")
+        return lo, hi
+
+    def _city_boundary(self, city: Optional[str]) -> Optional[dict]:
+        key = normalize(city or "")
+        if not key:
+            return None
+        if key in self.boundaries:
+            return self.boundaries[key]
+        head = normalize((city or "").split(",")[0])
+        if head in self.boundaries:
+            return self.boundaries[head]
+        close = difflib.get_close_matches(key, list(self.boundaries), n=1, cutoff=0.85)
+        return self.boundaries[close[0]] if close else None
+
+    def city_polygon(self, city: str):
+        """Simplified city boundary as a shapely geometry, or None."""
+        rec = self._city_boundary(city)
+        if rec is None:
+            return None
+        from shapely.geometry import shape
+        return shape(rec["geometry"])
+
+    def resolve(self, address: Optional[str] = None, city: Optional[str] = None) -> Optional[Dict]:
+        """
+        Best match for address → {lat, lon, name, kind, score}. A city with a known boundary
+        restricts matches to it; otherwise the city name only breaks ties between equal scores.
+        The city centre is returned only when no address is given; an address that
+        doesn't match resolves to None rather than silently to the centre.
+        """
+        boundary = self._city_boundary(city)
+        q = normalize(address or "")
+        if q:
+            return self._match(q, normalize(city or ""), boundary)
+        if boundary is not None:
+            lat, lon = boundary["center"]
+            return {"lat": lat, "lon": lon, "name": boundary["name"], "kind": "city", "score": 1.0}
+        return None
+
+    def _match(self, q: str, city_key: str, boundary: Optional[dict]) -> Optional[Dict]:
+        # 1) exact / prefix on the whole normalized string
+        lo, hi = self._prefix_range(self.keys, q)
+        exact = list(range(lo, min(hi, lo + 50)))
+        # 2) entries sharing query tokens (by prefix, or a close spelling), ranked by overlap
+        overlap: Counter = Counter()
+        for t in q.split():
+            tlo, thi = self._prefix_range(self._token_list, t)
+            toks = self._token_list[tlo:min(thi, tlo + 50)]
+            if not toks and len(t) >= 3:
+                slo, shi = self._prefix_range(self._token_list, t[:2])
+                toks = difflib.get_close_matches(t, self._token_list[slo:shi], n=3, cutoff=0.75)
+            for tok in toks:
+                overlap.update(self._tokens[tok][:2000])
+        cand = set(exact) | {i for i, _ in overlap.most_common(MAX_CANDIDATES)}
+        if not cand:
+            return None
+
+        def city_match(i: int) -> bool:
+            c = self.city[i]
+            return bool(city_key and c and (city_key.startswith(c) or c.startswith(city_key)))
+
+        def in_boundary(i: int) -> bool:
+            # only a resolved boundary filters; entries without a city are judged by position
+            minx, miny, maxx, maxy = boundary["bbox"]
+            return city_match(i) or (minx <= self.lon[i] <= maxx and miny <= self.lat[i] <= maxy)
+
+        # rank by match score; the city name only breaks ties, then the more specific kind wins
+        best, best_rank = None, None
+        sm = difflib.SequenceMatcher(None, "", q)
+        for i in cand:
+            if boundary is not None and not in_boundary(i):
+                continue
+            floor = MIN_SCORE if best_rank is None else max(MIN_SCORE, best_rank[0])
+            score = match_score(q, self.keys[i], floor, sm)
+            rank = (score, city_match(i), -_KIND_RANK.get(self.kinds[i], 9))
+            if best_rank is None or rank > best_rank:
+                best, best_rank = i, rank
+        best_score = best_rank[0] if best_rank is not None else 0.0
+        if best is None or best_score < MIN_SCORE:
+            return None
+        return {"lat": self.lat[best], "lon": self.lon[best], "name": self.names[best],
+                "kind": self.kinds[best], "score": round(best_score, 3)}
+
+
+@lru_cache(maxsize=4)
+def load_gazetteer(path: str = GAZETTEER_DIR) -> Optional[Gazetteer]:
+    """Load (once per process) the gazetteer written by build_gazetteer, or None if absent."""
+    b_fp, e_fp = os.path.join(path, "boundaries.json"), os.path.join(path, "entries.json")
+    if not (os.path.exists(b_fp) and os.path.exists(e_fp)):
+        return None
+    with open(b_fp, "r", encoding="utf-8") as f:
+        boundaries = json.load(f)
+    with open(e_fp, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    return Gazetteer(boundaries, index)
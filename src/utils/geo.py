@@ -1,7 +1,15 @@
 from __future__ import annotations
 import geopandas as gpd
 
+from src.utils.gazetteer import load_gazetteer
+
 def get_city_polygon(place_name: str = "Bengaluru, India") -> gpd.GeoSeries:
+    # Local gazetteer first (scripts/build_gazetteer.py); Nominatim only on a miss
+    gz = load_gazetteer()
+    geom = gz.city_polygon(place_name) if gz is not None else None
+    if geom is not None:
+        return gpd.GeoSeries([geom], crs="EPSG:4326")
+
     import osmnx as ox
     gdf = ox.geocode_to_gdf(place_name)
     return gdf.geometry
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import warnings
+
+import numpy as np
+
+# --- Integer H3 API (uint64 cell ids) for both h3 v3 and v4 ---
+# Both major versions ship `h3.api.numpy_int`; only the function names differ.
+from h3.api import numpy_int as _h3i
+
+if hasattr(_h3i, "polyfill"):  # h3 v3
+    def cells_in_geojson(geojson: dict, res: int) -> np.ndarray:
+        return np.asarray(_h3i.polyfill(geojson, res, geo_json_conformant=True), dtype=np.uint64)
+
+    def cell_boundary(h: int) -> list:
+        # closed (lon, lat) ring
+        return [tuple(p) for p in _h3i.h3_to_geo_boundary(h, geo_json=True)]
+
+    latlng_to_cell = _h3i.geo_to_h3
+    grid_disk = _h3i.k_ring
+    cell_to_parent = _h3i.h3_to_parent
+    get_resolution = _h3i.h3_get_resolution
+    compact_cells = _h3i.compact
+    int_to_str = _h3i.h3_to_string
+    str_to_int = _h3i.string_to_h3
+else:  # h3 v4
+    def cells_in_geojson(geojson: dict, res: int) -> np.ndarray:
+        return np.asarray(_h3i.geo_to_cells(geojson, res), dtype=np.uint64)
+
+    def cell_boundary(h: int) -> list:
+        ring = [(lng, lat) for lat, lng in _h3i.cell_to_boundary(h)]
+        return ring + ring[:1]
+
+    latlng_to_cell = _h3i.latlng_to_cell
+    grid_disk = _h3i.grid_disk
+    cell_to_parent = _h3i.cell_to_parent
+    get_resolution = _h3i.get_resolution
+    compact_cells = _h3i.compact_cells
+    int_to_str = _h3i.int_to_str
+    str_to_int = _h3i.str_to_int
+
+# --- Batched point indexing ---
+# Optional dependency: h3ronpy (Rust, vectorized). Without it every point is one h3 call.
+try:
+    from h3ronpy.vector import coordinates_to_cells as _coords_to_cells  # h3ronpy >= 0.22
+except ImportError:
+    try:
+        from h3ronpy.arrow.vector import coordinates_to_cells as _coords_to_cells
+    except ImportError:
+        _coords_to_cells = None
+
+_RES_SHIFT = 52
+_RES_MASK = np.uint64(0xF << _RES_SHIFT)
+
+
+def latlng_to_cells(lat, lng, res: int) -> np.ndarray:
+    """Index coordinate arrays to uint64 cells at one resolution."""
+    lat = np.ascontiguousarray(lat, dtype=np.float64)
+    lng = np.ascontiguousarray(lng, dtype=np.float64)
+    if lat.size == 0:
+        return np.empty(0, dtype=np.uint64)
+    if _coords_to_cells is not None:
+        return _latlng_to_cells_h3ronpy(lat, lng, res)
+    return np.fromiter((latlng_to_cell(a, b, res) for a, b in zip(lat, lng)), dtype=np.uint64, count=lat.size)
+
+
+def _latlng_to_cells_h3ronpy(lat: np.ndarray, lng: np.ndarray, res: int) -> np.ndarray:
+    global _coords_to_cells
+    try:
+        out = _coords_to_cells(lat, lng, res)
+        return np.asarray(out.to_numpy(zero_copy_only=False), dtype=np.uint64)
+    except (TypeError, ValueError, AttributeError) as e:
+        # unsupported h3ronpy API: say so once and use the per-point path from now on
+        warnings.warn(f"h3ronpy coordinates_to_cells failed ({e!r}); falling back to per-point h3", RuntimeWarning)
+        _coords_to_cells = None
+        return latlng_to_cells(lat, lng, res)
+
+
+def get_resolutions(cells) -> np.ndarray:
+    """Vectorized resolution lookup: bits 52-55 of each cell id."""
+    cells = np.asarray(cells, dtype=np.uint64)
+    return ((cells & _RES_MASK) >> np.uint64(_RES_SHIFT)).astype(np.uint8)
+
+
+def cells_to_parent(cells, res: int) -> np.ndarray:
+    """Vectorized parent lookup: rewrite the resolution field and blank finer digits."""
+    cells = np.asarray(cells, dtype=np.uint64)
+    unused = np.uint64((1 << (3 * (15 - res))) - 1)
+    return (cells & ~_RES_MASK) | np.uint64(res << _RES_SHIFT) | unused
+
+
+def latlng_to_cells_multi(lat, lng, resolutions) -> dict:
+    """
+    Index once at the finest resolution and derive the coarser ones as its H3 parents.
+    Parents keep the hierarchy consistent for aggregation; near cell edges they can
+    differ from indexing the point directly at the coarse resolution.
+    """
+    resolutions = sorted(set(int(r) for r in resolutions))
+    finest = latlng_to_cells(lat, lng, resolutions[-1])
+    return {r: cells_to_parent(finest, r) for r in resolutions}
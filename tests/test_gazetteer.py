@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from src.utils.gazetteer import Gazetteer, build_gazetteer, load_gazetteer
+
+def _node(name, lat, lon, **tags):
+    return {"type": "node", "lat": lat, "lon": lon, "tags": {"name": name, **tags}}
+
+@pytest.fixture(scope="module")
+def gz(tmp_path_factory) -> Gazetteer:
+    src = tmp_path_factory.mktemp("osm")
+    elements = [
+        _node("iconic FITNESS", 12.887, 77.582),
+        _node("BurnOut Fitness", 12.950, 77.716, **{"addr:city": "Bangalore"}),
+        _node("Rajyoga Meditation Center", 12.890, 77.579),
+        _node("1st Main Road", 12.930, 77.600),
+        _node("80 Feet Road kormangala", 12.935, 77.625),
+        _node("100 Feet Road", 12.972, 77.641),
+        _node("Cafe Chennai", 13.080, 80.270),
+    ]
+    (src / "overpass.json").write_text(json.dumps({"elements": elements}))
+    city = {"type": "Feature", "properties": {"name": "Bengaluru", "boundary": "administrative"},
+            "geometry": {"type": "Polygon", "coordinates": [[[77.4, 12.8], [77.8, 12.8], [77.8, 13.1],
+                                                             [77.4, 13.1], [77.4, 12.8]]]}}
+    (src / "city.json").write_text(json.dumps({"type": "FeatureCollection", "features": [city]}))
+    out = tmp_path_factory.mktemp("gazetteer")
+    assert build_gazetteer([str(src)], str(out)) == (1, 7)
+    return load_gazetteer(str(out))
+
+@pytest.mark.parametrize("address, city, expected", [
+    ("iconic fitness", "Bangalore", "iconic FITNESS"),          # city without boundary: no filter
+    ("Rajyoga Meditation Center", "Bengaluru Urban", "Rajyoga Meditation Center"),
+    ("iconc fitnes", None, "iconic FITNESS"),                    # typos
+    ("100 feet road indiranagar", None, "100 Feet Road"),        # extra words in the query
+    ("Rajyoga Meditation Centre", "Bengaluru", "Rajyoga Meditation Center"),
+])
+def test_resolves_best_match(gz, address, city, expected):
+    hit = gz.resolve(address, city)
+    assert hit is not None and hit["name"] == expected, hit
+
+@pytest.mark.parametrize("address, city", [
+    ("mg road", None),                  # only shares "road" with 1st Main Road
+    ("120 feet road", None),            # different street number
+    ("cafe chennai", "Bengaluru"),      # outside the resolved boundary
+    ("totally unknown place", "Bengaluru"),
+])
+def test_weak_or_out_of_city_matches_resolve_to_none(gz, address, city):
+    assert gz.resolve(address, city) is None
+
+def test_city_centre_only_without_address(gz):
+    hit = gz.resolve(None, "Bengaluru")
+    assert hit["kind"] == "city" and hit["name"] == "Bengaluru"
+    assert gz.resolve(None, "Atlantis") is None
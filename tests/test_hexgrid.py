@@ -0,0 +1,77 @@
+import json
+import math
+
+import numpy as np
+import pytest
+from h3.api import numpy_int as h3i
+
+from src.features.hexgrid import HexGrid, write_geojson
+from src.utils import h3compat
+
+# h3 v3 / v4 name for the one call the shim doesn't wrap
+_children = getattr(h3i, "cell_to_children", None) or getattr(h3i, "h3_to_children")
+
+PARENT = h3compat.latlng_to_cell(12.97, 77.59, 7)
+
+def _children_of(cell, res):
+    return np.sort(np.asarray(list(_children(cell, res)), dtype=np.uint64))
+
+def test_resolutions_and_parents_match_h3():
+    cells = h3compat.grid_disk(h3compat.latlng_to_cell(12.97, 77.59, 9), 3)
+    grid = HexGrid(cells)
+    assert (grid.resolutions == 9).all()
+    for r in (3, 6, 8, 9):
+        expected = [h3compat.cell_to_parent(int(h), r) for h in grid.ids]
+        assert h3compat.cells_to_parent(grid.ids, r).tolist() == expected
+
+def test_positions_hits_misses_and_empty():
+    kids = _children_of(PARENT, 8)
+    grid = HexGrid(kids[::-1], {"v": np.arange(len(kids), dtype=float)})  # unsorted input
+    assert (np.diff(grid.ids.astype(np.float64)) > 0).all()
+    outside = np.uint64(h3compat.latlng_to_cell(13.5, 78.0, 8))
+    pos = grid.positions([kids[3], outside, kids[0], PARENT])
+    assert pos.tolist() == [3, -1, 0, -1]
+    assert grid["v"][3] == len(kids) - 1 - 3  # columns follow the sort
+
+    empty = HexGrid(np.array([], dtype=np.uint64))
+    assert empty.positions([kids[0], outside]).tolist() == [-1, -1]
+    assert empty.positions([]).shape == (0,)
+
+def test_to_parent_aggregates_with_count():
+    kids = _children_of(PARENT, 9)  # 49 cells under one res-7 parent
+    grid = HexGrid(kids, {"pop": np.ones(len(kids)), "score": np.linspace(0, 1, len(kids))})
+    up = grid.to_parent(8, {"score": "mean"})
+    assert len(up) == 7 and (up.resolutions == 8).all()
+    assert up["pop"].tolist() == [7.0] * 7 and up["count"].tolist() == [7.0] * 7
+    top = up.to_parent(7, {"score": "mean"})
+    assert top.ids.tolist() == [PARENT]
+    assert top["count"][0] == 49 and top["pop"][0] == 49
+    assert top["score"][0] == pytest.approx(0.5)
+
+def test_compact_merges_complete_sibling_sets():
+    kids = _children_of(PARENT, 8)
+    stray = np.uint64(h3compat.latlng_to_cell(13.5, 78.0, 8))
+    grid = HexGrid(np.append(kids, stray), {"pop": np.arange(1, 9, dtype=float)})
+    out = grid.compact()
+    assert sorted(out.ids.tolist()) == sorted(int(h) for h in h3compat.compact_cells(grid.ids))
+    assert out["pop"][out.positions([PARENT])[0]] == sum(range(1, 8))
+    assert out["pop"][out.positions([stray])[0]] == 8
+    # nothing to merge → identical copy
+    partial = HexGrid(kids[:5], {"pop": np.ones(5)})
+    assert partial.compact().ids.tolist() == partial.ids.tolist()
+    with pytest.raises(ValueError):
+        HexGrid(np.append(kids, PARENT)).compact()
+
+def test_features_and_write_geojson(tmp_path):
+    kids = _children_of(PARENT, 8)[:3]
+    grid = HexGrid(kids, {"pop": [1.0, math.nan, 3.0], "score": [0.1, 0.2, 0.3]})
+    fp = tmp_path / "hexes.geojson"
+    assert write_geojson(str(fp), grid.features({"category": "cafe"}, ["pop"])) == 3
+    data = json.loads(fp.read_text())
+    assert data["type"] == "FeatureCollection" and len(data["features"]) == 3
+    props = [f["properties"] for f in data["features"]]
+    assert [p["h3"] for p in props] == [h3compat.int_to_str(h) for h in grid.ids]
+    assert [p["pop"] for p in props] == [1.0, None, 3.0]
+    assert all(p["category"] == "cafe" and "score" not in p for p in props)
+    ring = data["features"][0]["geometry"]["coordinates"][0]
+    assert ring[0] == ring[-1] and len(ring) >= 7
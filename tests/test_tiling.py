@@ -0,0 +1,25 @@
+import numpy as np
+import geopandas as gpd
+from shapely.geometry import Point
+
+from src.features.tiling import assign_points_to_h3
+from src.utils import h3compat
+
+def _points(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    return gpd.GeoDataFrame(geometry=[Point(x, y) for x, y in
+                                      zip(rng.uniform(77.4, 77.8, n), rng.uniform(12.8, 13.1, n))], crs="EPSG:4326")
+
+def test_single_resolution_matches_h3():
+    pts = _points()
+    got = assign_points_to_h3(pts, 8)["h3"].tolist()
+    assert got == [h3compat.int_to_str(h3compat.latlng_to_cell(p.y, p.x, 8)) for p in pts.geometry]
+
+def test_multi_resolution_columns_are_finest_cell_and_its_parents():
+    pts = _points()
+    multi = assign_points_to_h3(pts, [9, 7, 8])
+    assert {"h3_9", "h3_parent_8", "h3_parent_7"} <= set(multi.columns) and "h3_8" not in multi
+    assert multi["h3_9"].tolist() == assign_points_to_h3(pts, 9)["h3"].tolist()
+    finest = [h3compat.str_to_int(h) for h in multi["h3_9"]]
+    for r in (7, 8):
+        assert multi[f"h3_parent_{r}"].tolist() == [h3compat.int_to_str(h3compat.cell_to_parent(h, r)) for h in finest]